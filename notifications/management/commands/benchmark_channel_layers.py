@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from playpro.channel_layers import CHANNEL_LAYER_BACKENDS, build_channel_layers
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares group_send throughput and delivery time of the channel layer "
+        "backends. Redis backends use CHANNEL_REDIS_HOSTS, or --hosts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backends",
+            nargs="+",
+            choices=list(CHANNEL_LAYER_BACKENDS),
+            default=list(CHANNEL_LAYER_BACKENDS),
+        )
+        parser.add_argument("--hosts", nargs="+", help="Redis URLs to shard over.")
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--subscribers", type=int, default=10)
+        parser.add_argument("--messages", type=int, default=10)
+
+    def handle(self, *args, **options):
+        hosts = options["hosts"] or settings.CHANNEL_REDIS_HOSTS
+        for backend in options["backends"]:
+            extra = {"capacity": options["messages"] * options["groups"]}
+            if backend != "memory":
+                # Keeps flush() away from live channel layer keys.
+                extra["prefix"] = "asgi-benchmark"
+            config = build_channel_layers(backend, hosts, **extra)["default"]
+            layer = import_string(config["BACKEND"])(**config["CONFIG"])
+            sent, delivered = asyncio.run(self._run(layer, options))
+            total = options["groups"] * options["messages"]
+            self.stdout.write(
+                f"{backend:<7} {total:>7} group_sends  "
+                f"{total / sent:>10.0f} sends/s  "
+                f"{total * options['subscribers'] / delivered:>10.0f} deliveries/s"
+            )
+
+    async def _run(self, layer, options):
+        groups = [f"benchmark.{index}" for index in range(options["groups"])]
+        channels = []
+        for group in groups:
+            for _ in range(options["subscribers"]):
+                channel = await layer.new_channel()
+                await layer.group_add(group, channel)
+                channels.append(channel)
+
+        async def drain(channel):
+            for _ in range(options["messages"]):
+                await layer.receive(channel)
+
+        # Receivers have to be waiting for pub/sub to deliver at all.
+        receivers = [asyncio.ensure_future(drain(channel)) for channel in channels]
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        for message in range(options["messages"]):
+            await asyncio.gather(
+                *(
+                    layer.group_send(group, {"type": "benchmark", "n": message})
+                    for group in groups
+                )
+            )
+        sent = time.perf_counter() - start
+        await asyncio.gather(*receivers)
+        delivered = time.perf_counter() - start
+        await layer.flush()
+        return sent, delivered
@@ -0,0 +1,126 @@
+import asyncio
+import time
+import tracemalloc
+
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from playpro.channel_layers import build_channel_layers
+from playpro.middleware import JWTAuthMiddleware
+from playpro.urls import websocket_urlpatterns
+from users.factories import SchoolFactory, UserFactory
+from users.models import User
+
+IN_MEMORY_CHANNEL_LAYERS = build_channel_layers("memory", capacity=1000)
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def percentiles(values):
+    values = sorted(values)
+    return {
+        "p50": values[len(values) // 2] * 1000,
+        "p95": values[int(len(values) * 0.95) - 1] * 1000,
+        "max": values[-1] * 1000,
+    }
+
+
+def format_percentiles(label, values):
+    return "{:<10} p50 {p50:>8.2f} ms  p95 {p95:>8.2f} ms  max {max:>8.2f} ms".format(
+        label, **percentiles(values)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens concurrent notification sockets against the in-memory channel "
+        "layer and a local memory cache and reports connect latency, group_send fan-out latency and "
+        "memory per connection. Presence is disabled, so no Redis is needed. "
+        "Seeded users are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sockets", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--messages", type=int, default=10)
+        parser.add_argument("--timeout", type=float, default=60)
+
+    def handle(self, *args, **options):
+        school = SchoolFactory()
+        users = UserFactory.create_batch(options["users"], school=school)
+        try:
+            with override_settings(
+                CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+                CACHES=LOCAL_CACHES,
+                PRESENCE_ENABLED=False,
+            ):
+                asyncio.run(self._run(users, options))
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            school.delete()
+
+    async def _run(self, users, options):
+        application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+        timeout = options["timeout"]
+        connect_times = []
+
+        async def open_socket(index):
+            communicator = WebsocketCommunicator(
+                application,
+                f"/ws/notifications/benchmark/?token={tokens[index % len(tokens)]}",
+            )
+            start = time.perf_counter()
+            connected, _ = await communicator.connect(timeout=timeout)
+            connect_times.append(time.perf_counter() - start)
+            if not connected:
+                raise RuntimeError("Socket connection refused.")
+            # Drains the replay frame, fan-out must only time broadcasts.
+            await communicator.receive_from(timeout=timeout)
+            return communicator
+
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        communicators = await asyncio.gather(
+            *(open_socket(index) for index in range(options["sockets"]))
+        )
+        memory_per_socket = (tracemalloc.get_traced_memory()[0] - memory_before) / len(
+            communicators
+        )
+        tracemalloc.stop()
+
+        channel_layer = get_channel_layer()
+        fan_out_times = []
+
+        async def receive(communicator, start):
+            await communicator.receive_from(timeout=timeout)
+            fan_out_times.append(time.perf_counter() - start)
+
+        for message in range(options["messages"]):
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    channel_layer.group_send(
+                        user.notifications_channel,
+                        {"type": "notification", "message": {"content": message}},
+                    )
+                    for user in users
+                )
+            )
+            await asyncio.gather(
+                *(receive(communicator, start) for communicator in communicators)
+            )
+
+        await asyncio.gather(
+            *(communicator.disconnect() for communicator in communicators)
+        )
+        self.stdout.write(
+            f"{len(communicators)} sockets, {len(users)} users, "
+            f"{options['messages']} messages per user"
+        )
+        self.stdout.write(format_percentiles("connect", connect_times))
+        self.stdout.write(format_percentiles("fan-out", fan_out_times))
+        self.stdout.write(f"memory     {memory_per_socket / 1024:>8.1f} KiB per socket")
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.3 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_archivednotification_unreadcounter_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivednotification",
+            name="payload",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="payload",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
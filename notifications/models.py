@@ -7,5 +7,37 @@ from users.models import User
 class Notification(TimestampAbstractModel, models.Model):
 
     meta = models.JSONField(default=dict)
+    # Pre-rendered JSON, see notifications.registry.render_payload.
+    payload = models.TextField(blank=True, default="")
     read = models.BooleanField(default=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "read", "created_at"]),
+            models.Index(fields=["user", "-id"]),
+        ]
+
+
+class UnreadCounter(models.Model):
+    """Unread notifications of a user, kept in step with ``Notification``."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="unread_counter",
+    )
+    count = models.IntegerField(default=0)
+
+
+class ArchivedNotification(models.Model):
+    """Read notifications past retention, moved out of the hot table."""
+
+    id = models.BigIntegerField(primary_key=True)
+    meta = models.JSONField(default=dict)
+    payload = models.TextField(blank=True, default="")
+    read = models.BooleanField(default=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
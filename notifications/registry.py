@@ -0,0 +1,74 @@
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.urls import reverse
+
+from notifications.enums import NotificationTypes
+
+# url and message take the notification meta and return strings.
+NotificationRenderer = namedtuple("NotificationRenderer", "url message")
+
+
+def _no_url(meta):
+    return ""
+
+
+def _invitation_url(meta):
+    return "{}{}".format(
+        settings.BASE_URL,
+        reverse(
+            "tournaments:tournament_invitations-detail", kwargs={"pk": meta["obj_pk"]}
+        ),
+    )
+
+
+REGISTRY = {
+    NotificationTypes.INVITATION: NotificationRenderer(
+        url=_invitation_url,
+        message=lambda meta: "You have been invited to the team {} in {} tournament.".format(
+            meta["team_name"], meta["tournament_name"]
+        ),
+    ),
+    NotificationTypes.INVITATION_REVOKE: NotificationRenderer(
+        url=_no_url,
+        message=lambda meta: "Your invitation to the team {} in {} tournament has been revoked.".format(
+            meta["team_name"], meta["tournament_name"]
+        ),
+    ),
+    NotificationTypes.INVITATION_REFUSED: NotificationRenderer(
+        url=_no_url,
+        message=lambda meta: "{} has denied your invitation to team {} in tournament {}".format(
+            meta["invited_user"], meta["team_name"], meta["tournament_name"]
+        ),
+    ),
+}
+
+
+def render_payload(meta):
+    """
+    Canonical wire payload of a notification, without its per-row ``id``
+    and ``read`` keys. Rendered once and stored on the row.
+    """
+    notification_type = NotificationTypes(meta["type"])
+    renderer = REGISTRY[notification_type]
+    return json.dumps(
+        {
+            "type": notification_type.value,
+            "url": renderer.url(meta),
+            "message": renderer.message(meta),
+        },
+        separators=(",", ":"),
+    )
+
+
+def wire_message(notification):
+    """
+    JSON object of the notification in the client schema: id, read, type,
+    url and message. Splices the stored payload, rows from before payloads
+    were stored are rendered on the fly.
+    """
+    payload = notification.payload or render_payload(notification.meta)
+    return '{{"id":{},"read":{},{}'.format(
+        notification.pk, "true" if notification.read else "false", payload[1:]
+    )
@@ -0,0 +1,5 @@
+from rest_framework import serializers
+
+
+class NotificationReadSerializer(serializers.Serializer):
+    cursor = serializers.IntegerField(min_value=1)
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from notifications.models import ArchivedNotification, Notification, UnreadCounter
+from notifications.registry import render_payload
+from playpro.redis import get_redis
+from users.models import User
+
+TOURNAMENT_GROUP = "tournament.{}"
+MATCH_GROUP = "match.{}"
+COALESCE_KEY = "notifications:coalesce:{}:{}"
+COALESCE_WINDOW = 30
+PUBLISH_BATCH_SIZE = 100
+BULK_BATCH_SIZE = 1000
+ARCHIVE_AFTER = timedelta(days=90)
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_MAX_BATCHES = 100
+
+
+def notify(users, notification_type, payload):
+    """
+    Notify ``users`` (instances or ids) once the current transaction
+    commits. Rows are written and published by a Celery worker.
+    """
+    user_ids = [getattr(user, "pk", user) for user in users]
+    if not user_ids:
+        return
+    from notifications.tasks import dispatch_notifications
+
+    transaction.on_commit(
+        lambda: dispatch_notifications.delay(user_ids, notification_type.value, payload)
+    )
+
+
+def coalesce(user_ids, notification_type, payload):
+    """Drop users who got the very same notification within the window."""
+    digest = hashlib.sha1(
+        json.dumps([notification_type, payload], sort_keys=True).encode()
+    ).hexdigest()
+    user_ids = list(dict.fromkeys(user_ids))
+    pipeline = get_redis().pipeline(transaction=False)
+    for user_id in user_ids:
+        pipeline.set(
+            COALESCE_KEY.format(user_id, digest), 1, nx=True, ex=COALESCE_WINDOW
+        )
+    return [user_id for user_id, fresh in zip(user_ids, pipeline.execute()) if fresh]
+
+
+async def publish(messages):
+    """Group sends ``(group, message)`` pairs, ``PUBLISH_BATCH_SIZE`` at a time."""
+    channel_layer = get_channel_layer()
+    for start in range(0, len(messages), PUBLISH_BATCH_SIZE):
+        await asyncio.gather(
+            *(
+                channel_layer.group_send(group, message)
+                for group, message in messages[start : start + PUBLISH_BATCH_SIZE]
+            )
+        )
+
+
+def dispatch(user_ids, notification_type, payload):
+    user_ids = coalesce(user_ids, notification_type, payload)
+    if not user_ids:
+        return []
+    meta = dict(payload, type=notification_type)
+    rendered = render_payload(meta)
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(user_id=user_id, meta=meta, payload=rendered)
+                for user_id in user_ids
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=user_id) for user_id in user_ids],
+            batch_size=BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        UnreadCounter.objects.filter(user_id__in=user_ids).update(count=F("count") + 1)
+    channels = dict(
+        User.objects.filter(pk__in=user_ids).values_list("pk", "notifications_channel")
+    )
+    message = json.loads(rendered)
+    async_to_sync(publish)(
+        [
+            (
+                channels[notification.user_id],
+                {
+                    "type": "notification",
+                    "message": dict(message, id=notification.pk, read=False),
+                },
+            )
+            for notification in notifications
+            if notification.user_id in channels
+        ]
+    )
+    return notifications
+
+
+def get_unread_count(user):
+    return (
+        UnreadCounter.objects.filter(user=user).values_list("count", flat=True).first()
+        or 0
+    )
+
+
+@transaction.atomic
+def mark_read(user, cursor):
+    """Mark every unread notification of ``user`` up to ``cursor`` as read."""
+    updated = Notification.objects.filter(user=user, read=False, pk__lte=cursor).update(
+        read=True
+    )
+    if updated:
+        UnreadCounter.objects.filter(user=user).update(
+            count=Greatest(F("count") - updated, 0)
+        )
+    return updated
+
+
+def archive_notifications():
+    """
+    Move read notifications older than ``ARCHIVE_AFTER`` to
+    ``ArchivedNotification``, one short transaction per batch.
+    """
+    cutoff = timezone.now() - ARCHIVE_AFTER
+    archived = 0
+    for _ in range(ARCHIVE_MAX_BATCHES):
+        with transaction.atomic():
+            rows = list(
+                Notification.objects.select_for_update(skip_locked=True)
+                .filter(read=True, created_at__lt=cutoff)
+                .order_by("pk")
+                .values("id", "meta", "payload", "read", "user_id", "created_at")[
+                    :ARCHIVE_BATCH_SIZE
+                ]
+            )
+            if not rows:
+                break
+            ArchivedNotification.objects.bulk_create(
+                [ArchivedNotification(**row) for row in rows], ignore_conflicts=True
+            )
+            Notification.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        archived += len(rows)
+    return archived
+
+
+def broadcast(group, payload):
+    async_to_sync(get_channel_layer().group_send)(
+        group, {"type": "notification", "message": payload}
+    )
+
+
+def broadcast_to_tournament(tournament_id, payload):
+    """Push ``payload`` to every connected participant of the tournament."""
+    broadcast(TOURNAMENT_GROUP.format(tournament_id), payload)
+
+
+def broadcast_to_match(match_id, payload):
+    """Push ``payload`` to every connected contestant of the match."""
+    broadcast(MATCH_GROUP.format(match_id), payload)
@@ -0,0 +1,31 @@
+from asgiref.sync import async_to_sync
+
+from notifications.services import archive_notifications, dispatch, publish
+from playpro.celery import app
+from playpro.presence import PRESENCE_KEY, prune_presence
+
+
+@app.task()
+def dispatch_notifications(user_ids, notification_type, payload):
+    dispatch(user_ids, notification_type, payload)
+
+
+@app.task()
+def archive_read_notifications():
+    return archive_notifications()
+
+
+@app.task()
+def prune_expired_presence():
+    lobby_prefix = PRESENCE_KEY.format("lobby", "")
+    async_to_sync(publish)(
+        [
+            (
+                key[len(lobby_prefix) :],
+                {"type": "presence_change", "event": "leave", "user": user_id},
+            )
+            for key, user_ids in prune_presence().items()
+            if key.startswith(lobby_prefix)
+            for user_id in user_ids
+        ]
+    )
@@ -1,3 +1,74 @@
+from datetime import date, timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from notifications.models import ArchivedNotification, Notification, UnreadCounter
+from notifications.services import (
+    ARCHIVE_AFTER,
+    archive_notifications,
+    get_unread_count,
+    mark_read,
+)
+from users.models import School, User
+
+
+def create_user():
+    # bulk_create skips User.save(), which looks the default avatar up in
+    # the cache.
+    (user,) = User.objects.bulk_create(
+        [
+            User(
+                email="player@test.com",
+                school_email="player@school.com",
+                first_name="Player",
+                last_name="One",
+                nickname="player-one",
+                user_type=User.UserType.STUDENT,
+                dob=date(2006, 1, 1),
+                school=School.objects.create(name="Test school"),
+                graduation_year="2024",
+            )
+        ]
+    )
+    return user
+
+
+class UnreadCounterTestCase(TestCase):
+    def test_mark_read_lowers_the_counter_up_to_the_cursor(self):
+        user = create_user()
+        notifications = Notification.objects.bulk_create(
+            [Notification(user=user) for _ in range(3)]
+        )
+        UnreadCounter.objects.create(user=user, count=3)
+        self.assertEqual(mark_read(user, notifications[1].pk), 2)
+        self.assertEqual(get_unread_count(user), 1)
+        self.assertEqual(
+            list(Notification.objects.filter(read=False).values_list("pk", flat=True)),
+            [notifications[2].pk],
+        )
+        # Already read notifications are not counted twice.
+        self.assertEqual(mark_read(user, notifications[1].pk), 0)
+        self.assertEqual(get_unread_count(user), 1)
+
 
-# Create your tests here.
+class ArchiveNotificationsTestCase(TestCase):
+    def test_only_old_read_notifications_are_archived(self):
+        user = create_user()
+        old_read, old_unread, recent_read = Notification.objects.bulk_create(
+            [
+                Notification(user=user, read=True, payload="old"),
+                Notification(user=user, read=False),
+                Notification(user=user, read=True),
+            ]
+        )
+        Notification.objects.filter(pk__in=[old_read.pk, old_unread.pk]).update(
+            created_at=timezone.now() - ARCHIVE_AFTER - timedelta(days=1)
+        )
+        self.assertEqual(archive_notifications(), 1)
+        self.assertEqual(
+            set(Notification.objects.values_list("pk", flat=True)),
+            {old_unread.pk, recent_read.pk},
+        )
+        archived = ArchivedNotification.objects.get()
+        self.assertEqual((archived.pk, archived.payload), (old_read.pk, "old"))
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from notifications.views import NotificationReadAPIView, UnreadCountAPIView
+
+app_name = "notifications"
+
+urlpatterns = [
+    path("read/", NotificationReadAPIView.as_view()),
+    path("unread-count/", UnreadCountAPIView.as_view()),
+]
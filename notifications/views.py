@@ -0,0 +1,18 @@
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from notifications.serializers import NotificationReadSerializer
+from notifications.services import get_unread_count, mark_read
+
+
+class NotificationReadAPIView(APIView):
+    def post(self, request, *args, **kwargs):
+        serializer = NotificationReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user, serializer.validated_data["cursor"])
+        return Response({"updated": updated, "unread": get_unread_count(request.user)})
+
+
+class UnreadCountAPIView(APIView):
+    def get(self, request, *args, **kwargs):
+        return Response({"unread": get_unread_count(request.user)})
@@ -1,4 +1,6 @@
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
 
 
 class CustomBigIntegerAuto(models.BigAutoField):
@@ -18,3 +20,43 @@ class TimestampAbstractModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class ImageRenditionsMixin:
+    """
+    Renders the image fields listed in ``RENDITIONS`` ({field: RenditionSpec})
+    in a Celery task once an upload is committed, into ``<field>_renditions``.
+    """
+
+    RENDITIONS = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial_images = self._get_image_names()
+
+    def _get_image_names(self):
+        # Read from __dict__ so deferred image fields are not fetched.
+        names = {}
+        for field_name in self.RENDITIONS:
+            value = self.__dict__.get(field_name)
+            names[field_name] = getattr(value, "name", value)
+        return names
+
+    def save(self, *args, **kwargs):
+        from playpro.images import build_model_renditions
+
+        changed = [
+            field_name
+            for field_name, name in self._get_image_names().items()
+            if name and (self._state.adding or name != self.initial_images[field_name])
+        ]
+        for field_name in changed:
+            setattr(self, f"{field_name}_renditions", {})
+        super().save(*args, **kwargs)
+        self.initial_images = self._get_image_names()
+        if changed:
+            transaction.on_commit(
+                partial(
+                    build_model_renditions.delay, self._meta.label, self.pk, changed
+                )
+            )
@@ -5,15 +5,15 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "playpro.production")
 
 django.setup()
 
-from channels.auth import AuthMiddlewareStack
 from channels.http import AsgiHandler
 from channels.routing import ProtocolTypeRouter, URLRouter
 
 from . import urls
+from .middleware import JWTAuthMiddleware
 
 application = ProtocolTypeRouter(
     {
         "http": AsgiHandler(),
-        "websocket": AuthMiddlewareStack(URLRouter(urls.websocket_urlpatterns)),
+        "websocket": JWTAuthMiddleware(URLRouter(urls.websocket_urlpatterns)),
     }
 )
@@ -24,8 +24,28 @@ app.conf.beat_schedule = {
     },
     "autocreate_matches_playoff_stage": {
         "task": "tournaments.tasks.create_tournament_ladder_next_stages",
+        "schedule": timedelta(minutes=30),
+    },
+    "flush_lobby_chat": {
+        "task": "tournaments.tasks.flush_lobby_chat",
+        "schedule": timedelta(minutes=1),
+    },
+    "prune_expired_presence": {
+        "task": "notifications.tasks.prune_expired_presence",
         "schedule": timedelta(minutes=1),
     },
+    "send_outbound_emails": {
+        "task": "users.tasks.send_outbound_emails",
+        "schedule": timedelta(minutes=1),
+    },
+    "purge_sent_emails": {
+        "task": "users.tasks.purge_sent_emails",
+        "schedule": crontab(hour=4, minute=30),
+    },
+    "archive_read_notifications": {
+        "task": "notifications.tasks.archive_read_notifications",
+        "schedule": crontab(hour=4, minute=0),
+    },
 }
 
 
@@ -0,0 +1,26 @@
+"""
+CHANNEL_LAYERS builder. Kept free of Django imports so settings modules
+can call it; a settings override of the backend or hosts has to rebuild
+CHANNEL_LAYERS with it as well.
+"""
+
+CHANNEL_LAYER_BACKENDS = {
+    # Consistent-hash shards channels and groups over all hosts.
+    "redis": "channels_redis.core.RedisChannelLayer",
+    # Redis pub/sub, shards the same way but keeps no per-channel queues.
+    "pubsub": "channels_redis.pubsub.RedisPubSubChannelLayer",
+    # Single process only, for tests and benchmarks.
+    "memory": "channels.layers.InMemoryChannelLayer",
+}
+
+
+def build_channel_layers(backend, hosts=None, **config):
+    if backend not in CHANNEL_LAYER_BACKENDS:
+        raise ValueError(
+            "Unknown channel layer backend {!r}, expected one of {}.".format(
+                backend, ", ".join(CHANNEL_LAYER_BACKENDS)
+            )
+        )
+    if backend != "memory":
+        config["hosts"] = list(hosts or [("127.0.0.1", 6379)])
+    return {"default": {"BACKEND": CHANNEL_LAYER_BACKENDS[backend], "CONFIG": config}}
@@ -0,0 +1,141 @@
+import hashlib
+from collections import namedtuple
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import get_storage_class
+
+from playpro.celery import app
+
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+IMAGE_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+# Transparent areas are flattened onto it, neither rendition format keeps them.
+BACKGROUND_COLOR = (255, 255, 255, 255)
+
+# sizes: {name: (width, height)}. Cropped renditions are cut to the aspect
+# ratio of that size around the centre and resized to exactly that size, the
+# others are fitted into it keeping the aspect ratio.
+RenditionSpec = namedtuple("RenditionSpec", "sizes formats crop")
+
+DEFAULT_RENDITIONS = RenditionSpec(
+    sizes={"thumbnail": (160, 160), "card": (640, 640), "full": (1920, 1920)},
+    formats=("webp", "jpeg"),
+    crop=False,
+)
+
+rendition_storage = get_storage_class(settings.RENDITION_FILE_STORAGE)()
+
+
+def get_target_size(source_size, size, crop):
+    if crop:
+        return size
+    scale = min(size[0] / source_size[0], size[1] / source_size[1], 1)
+    return (
+        max(1, round(source_size[0] * scale)),
+        max(1, round(source_size[1] * scale)),
+    )
+
+
+def get_crop_box(source_size, size):
+    width, height = source_size
+    if width * size[1] > height * size[0]:
+        crop_width = max(1, round(height * size[0] / size[1]))
+        left = (width - crop_width) // 2
+        return (left, 0, left + crop_width, height)
+    crop_height = max(1, round(width * size[1] / size[0]))
+    top = (height - crop_height) // 2
+    return (0, top, width, top + crop_height)
+
+
+def resize_image(im, size):
+    # reduce() is a cheap integer box downscale, resize() finishes the job.
+    factor = min(im.width // size[0], im.height // size[1])
+    if factor > 1:
+        im = im.reduce(factor)
+    if im.size == size:
+        return im
+    return im.resize(size, Image.LANCZOS)
+
+
+def flatten_image(im):
+    if im.mode in ("RGBA", "LA", "PA") or (
+        im.mode == "P" and "transparency" in im.info
+    ):
+        im = im.convert("RGBA")
+        background = Image.new("RGBA", im.size, BACKGROUND_COLOR)
+        background.alpha_composite(im)
+        im = background
+    return im.convert("RGB")
+
+
+def encode_image(im, image_format):
+    output = BytesIO()
+    quality = WEBP_QUALITY if image_format == "WEBP" else JPEG_QUALITY
+    im.save(output, format=image_format, quality=quality)
+    return output.getvalue()
+
+
+def build_renditions(fileobj, spec):
+    """
+    Render every rendition of ``spec`` out of a single decode pass and upload
+    them under content-hash keys. Returns ``{name: {format: storage key}}``.
+    """
+    data = fileobj.read()
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    im = Image.open(BytesIO(data))
+    # Lets JPEG decoding scale down by powers of two while staying large
+    # enough for the biggest rendition. The box is square as the EXIF
+    # orientation may still swap width and height.
+    longest = max(max(size) for size in spec.sizes.values())
+    im.draft("RGB", (longest, longest))
+    im = flatten_image(ImageOps.exif_transpose(im))
+    targets = {
+        name: get_target_size(im.size, size, spec.crop)
+        for name, size in spec.sizes.items()
+    }
+    renditions = {}
+    for name, size in targets.items():
+        source = im.crop(get_crop_box(im.size, size)) if spec.crop else im
+        rendered = resize_image(source, size)
+        renditions[name] = {}
+        for image_format in spec.formats:
+            key = f"renditions/{digest}/{name}.{image_format}"
+            if not rendition_storage.exists(key):
+                key = rendition_storage.save(
+                    key,
+                    ContentFile(encode_image(rendered, IMAGE_FORMATS[image_format])),
+                )
+            renditions[name][image_format] = key
+    return renditions
+
+
+def rendition_urls(renditions):
+    return {
+        name: {
+            image_format: rendition_storage.url(key)
+            for image_format, key in formats.items()
+        }
+        for name, formats in (renditions or {}).items()
+    }
+
+
+@app.task()
+def build_model_renditions(model_label, pk, field_names):
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    for field_name in field_names:
+        image = getattr(instance, field_name)
+        if not image:
+            continue
+        with image.open("rb") as source:
+            renditions = build_renditions(source, model.RENDITIONS[field_name])
+        # The image may have been replaced meanwhile, its own task handles it.
+        model.objects.filter(pk=pk, **{field_name: image.name}).update(
+            **{f"{field_name}_renditions": renditions}
+        )
@@ -0,0 +1,34 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from jwt import decode as jwt_decode, InvalidTokenError
+
+from users.cache import get_user_snapshot
+
+
+def get_token_user_id(scope):
+    try:
+        token = parse_qs(scope["query_string"].decode("utf8")).get("token")[0]
+        decoded_data = jwt_decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except (InvalidTokenError, TypeError):
+        return None
+    return decoded_data.get("user_id")
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates websocket connections from the ``token`` query parameter.
+    ``scope["user"]`` is a cached ``UserSnapshot``, the signature check alone
+    needs no database access.
+    """
+
+    async def __call__(self, scope, receive, send):
+        user_id = get_token_user_id(scope)
+        snapshot = None
+        if user_id is not None:
+            snapshot = await database_sync_to_async(get_user_snapshot)(user_id)
+        scope = dict(scope, user=snapshot or AnonymousUser())
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,146 @@
+"""
+Online presence per team, match lobby and tournament.
+
+Every scope is a sorted set of user ids scored by the time their presence
+expires. A user stays online while any of their sockets heartbeats within
+``PRESENCE_TTL``. Sockets are tracked per user and scope, so closing one of
+several sockets in a scope does not take the user offline there, while
+closing the last one does right away.
+
+Presence needs Redis. With ``PRESENCE_ENABLED`` off every call is a no-op
+that reports nobody online, for runs without Redis such as the socket
+benchmark.
+"""
+import time
+from itertools import islice
+
+from django.conf import settings
+
+from playpro.redis import get_async_redis, get_redis
+
+PRESENCE_TTL = 90
+PRESENCE_HEARTBEAT = 30
+PRESENCE_KEY = "presence:{}:{}"
+PRESENCE_CONNECTIONS_KEY = "presence:connections:{}:{}"
+PRESENCE_SCOPES_KEY = "presence:scopes"
+PRUNE_BATCH = 100
+
+# KEYS: n scope keys followed by their n connection keys.
+# ARGV: user id, channel name, now. Returns the scope keys left.
+LEAVE_SCRIPT = """
+local n = #KEYS / 2
+local left = {}
+for i = 1, n do
+    local connections = KEYS[n + i]
+    redis.call("ZREM", connections, ARGV[2])
+    redis.call("ZREMRANGEBYSCORE", connections, "-inf", ARGV[3])
+    if redis.call("ZCARD", connections) == 0
+        and redis.call("ZREM", KEYS[i], ARGV[1]) == 1 then
+        table.insert(left, KEYS[i])
+    end
+end
+return left
+"""
+
+# KEYS: the set of scope keys followed by scope keys. ARGV: now.
+# Returns {scope key, {expired user ids}, ...}.
+PRUNE_SCRIPT = """
+local pruned = {}
+for i = 2, #KEYS do
+    local expired = redis.call("ZRANGEBYSCORE", KEYS[i], "-inf", ARGV[1])
+    if #expired > 0 then
+        redis.call("ZREMRANGEBYSCORE", KEYS[i], "-inf", ARGV[1])
+        table.insert(pruned, KEYS[i])
+        table.insert(pruned, expired)
+    end
+    if redis.call("ZCARD", KEYS[i]) == 0 then
+        redis.call("SREM", KEYS[1], KEYS[i])
+    end
+end
+return pruned
+"""
+
+
+def team_presence_key(team_id):
+    return PRESENCE_KEY.format("team", team_id)
+
+
+def tournament_presence_key(tournament_id):
+    return PRESENCE_KEY.format("tournament", tournament_id)
+
+
+def lobby_presence_key(chat_channel):
+    return PRESENCE_KEY.format("lobby", chat_channel)
+
+
+def connections_key(user_id, key):
+    return PRESENCE_CONNECTIONS_KEY.format(user_id, key)
+
+
+async def touch(user_id, channel_name, keys):
+    """
+    Mark the connection online in ``keys``, used on connect and on every
+    heartbeat. Returns the keys the user was not online in before.
+    """
+    if not settings.PRESENCE_ENABLED:
+        return []
+    now = time.time()
+    expires = now + PRESENCE_TTL
+    client = get_async_redis()
+    pipeline = client.pipeline(transaction=False)
+    for key in keys:
+        pipeline.zscore(key, user_id)
+    scores = await pipeline.execute()
+    pipeline = client.pipeline(transaction=False)
+    for key in keys:
+        pipeline.zadd(connections_key(user_id, key), {channel_name: expires})
+        pipeline.expire(connections_key(user_id, key), PRESENCE_TTL)
+        pipeline.zadd(key, {user_id: expires})
+    if keys:
+        pipeline.sadd(PRESENCE_SCOPES_KEY, *keys)
+    await pipeline.execute()
+    return [key for key, score in zip(keys, scores) if score is None or score < now]
+
+
+async def leave(user_id, channel_name, keys):
+    """
+    Drop the connection. Returns the keys the user went offline in, leaving
+    out those where another of their sockets is still alive.
+    """
+    if not keys or not settings.PRESENCE_ENABLED:
+        return []
+    script = get_async_redis().register_script(LEAVE_SCRIPT)
+    return await script(
+        keys=[*keys, *(connections_key(user_id, key) for key in keys)],
+        args=[user_id, channel_name, time.time()],
+    )
+
+
+async def get_online(key):
+    if not settings.PRESENCE_ENABLED:
+        return []
+    return [
+        int(user_id)
+        for user_id in await get_async_redis().zrangebyscore(key, time.time(), "+inf")
+    ]
+
+
+def prune_presence():
+    """
+    Remove presence that outlived its heartbeat. Returns ``{key: [user
+    ids]}`` of the entries removed. Each batch of scopes is pruned by one
+    script, so a heartbeat cannot land between reading and removing.
+    """
+    if not settings.PRESENCE_ENABLED:
+        return {}
+    client = get_redis()
+    script = client.register_script(PRUNE_SCRIPT)
+    scopes = client.sscan_iter(PRESENCE_SCOPES_KEY, count=PRUNE_BATCH)
+    pruned = {}
+    batch = list(islice(scopes, PRUNE_BATCH))
+    while batch:
+        result = script(keys=[PRESENCE_SCOPES_KEY, *batch], args=[time.time()])
+        for key, user_ids in zip(result[::2], result[1::2]):
+            pruned[key] = [int(user_id) for user_id in user_ids]
+        batch = list(islice(scopes, PRUNE_BATCH))
+    return pruned
@@ -0,0 +1,25 @@
+import asyncio
+import weakref
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from redis.asyncio import Redis as AsyncRedis
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def get_async_redis():
+    # Async connections are bound to the loop that opened them.
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncRedis.from_url(
+            settings.REDIS_URL, decode_responses=True
+        )
+    return client
@@ -17,6 +17,8 @@ from sentry_sdk.integrations.django import DjangoIntegration
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 import dj_database_url
 
+from playpro.channel_layers import build_channel_layers
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Quick-start development settings - unsuitable for production
@@ -134,6 +136,8 @@ AUTH_PASSWORD_VALIDATORS = [
             "min_length_lower": 1,
             "min_length_upper": 1,
             "special_characters": "~!@#$%^&*()_+{}\":;'[]",
+            # Sorted binary SHA-1 digests, see manage.py build_breached_passwords.
+            "breached_passwords_file": None,
         },
     },
 ]
@@ -165,18 +169,25 @@ PLAYPRO_URL = "https://playpro.gg/"
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 CORS_ALLOW_ALL_ORIGINS = True
 
-CHANNEL_LAYERS = {
+CHANNEL_LAYER_BACKEND = "redis"
+CHANNEL_REDIS_HOSTS = [("127.0.0.1", 6379)]
+CHANNEL_LAYERS = build_channel_layers(CHANNEL_LAYER_BACKEND, CHANNEL_REDIS_HOSTS)
+ASGI_APPLICATION = "playpro.asgi.application"
+CACHES = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [("127.0.0.1", 6379)],
-        },
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://127.0.0.1:6379/1",
     },
 }
-ASGI_APPLICATION = "playpro.asgi.application"
+REDIS_URL = "redis://127.0.0.1:6379/2"
+PRESENCE_ENABLED = True
 NOTIFICATION_CHARSET = "QWERTYUIOPASDFGHJKLZXCVBNM1234567890"
+NOTIFICATION_REPLAY_SIZE = 20
 BASE_URL = "https://playpro.gg"
 DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
+RENDITION_FILE_STORAGE = "playpro.storages.RenditionStorage"
+PRIVATE_FILE_STORAGE = "playpro.storages.PrivateStorage"
+PRIVATE_STORAGE_BUCKET_NAME = "playpro-private-files"
 AWS_ACCESS_KEY_ID = ""
 AWS_SECRET_ACCESS_KEY = ""
 AWS_STORAGE_BUCKET_NAME = "playpro-media-files"
@@ -1,160 +1,257 @@
+import asyncio
 import json
-import uuid
 
-from asgiref.sync import async_to_sync
-from channels.generic.websocket import WebsocketConsumer
-from django.contrib.auth.models import AnonymousUser
-from django.urls import reverse
-from jwt import decode as jwt_decode, ExpiredSignatureError
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
 from django.conf import settings
-from urllib.parse import parse_qs
 
-from notifications.enums import NotificationTypes
 from notifications.models import Notification
+from notifications.registry import wire_message
+from playpro import presence
+from notifications.services import MATCH_GROUP, TOURNAMENT_GROUP
 from tournaments.models import TournamentMatch
-from users.models import User
+from tournaments.lobbies import (
+    LOBBY_CHAT_PAGE_SIZE,
+    append_lobby_message,
+    get_lobby_team_name,
+    get_recent_lobby_messages,
+)
 
 
-def get_user(scope):
+def build_notification_frame(notifications, cursor):
+    return '{{"notifications":[{}],"cursor":{}}}'.format(
+        ",".join(wire_message(notification) for notification in notifications),
+        json.dumps(cursor),
+    )
+
+
+def parse_cursor(value):
+    """History cursors are notification pks, anything else is rejected."""
+    if isinstance(value, bool):
+        return None
     try:
-        token = parse_qs(scope["query_string"].decode("utf8")).get("token")[0]
-        decoded_data = jwt_decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        return User.objects.get(pk=decoded_data.get("user_id"))
-    except (User.DoesNotExist, ExpiredSignatureError):
-        return AnonymousUser()
-
-
-def check_match_lobby_eligibility(user, room_channel):
-    if user.pk in TournamentMatch.objects.filter(
-        chat_channel=room_channel
-    ).prefetch_related("contestants__team_members").values_list(
-        "contestants__team_members__user__pk", flat=True
-    ):
-        return True
-    return False
-
-
-class NotificationConsumer(WebsocketConsumer):
-    def connect(self):
-        self.channel_group_name = uuid.uuid4()
-        self.user = get_user(self.scope)
-        if self.user.is_authenticated:
-            self.channel_group_name = self.user.notifications_channel
-            self.accept()
-            async_to_sync(self.channel_layer.group_add)(
-                self.channel_group_name, self.channel_name
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor > 0 else None
+
+
+@database_sync_to_async
+def get_initial_notifications(user):
+    """
+    Replay frame sent on connect: the last ``NOTIFICATION_REPLAY_SIZE``
+    notifications plus any older unread ones, newest first. The cursor
+    points below the last-N window, older ones are fetched on demand.
+    """
+    queryset = Notification.objects.filter(user_id=user.pk).only(
+        "payload", "meta", "read"
+    )
+    recent = list(queryset.order_by("-pk")[: settings.NOTIFICATION_REPLAY_SIZE + 1])
+    if len(recent) <= settings.NOTIFICATION_REPLAY_SIZE:
+        return build_notification_frame(recent, None)
+    recent.pop()
+    cursor = recent[-1].pk
+    unread = list(queryset.filter(read=False, pk__lt=cursor).order_by("-pk"))
+    return build_notification_frame(recent + unread, cursor)
+
+
+@database_sync_to_async
+def get_notification_history(user, cursor):
+    notifications = list(
+        Notification.objects.filter(user_id=user.pk, pk__lt=cursor)
+        .only("payload", "meta", "read")
+        .order_by("-pk")[: settings.NOTIFICATION_REPLAY_SIZE + 1]
+    )
+    if len(notifications) <= settings.NOTIFICATION_REPLAY_SIZE:
+        return build_notification_frame(notifications, None)
+    notifications.pop()
+    return build_notification_frame(notifications, notifications[-1].pk)
+
+
+@database_sync_to_async
+def get_open_match_ids(user):
+    if not user.teams:
+        return []
+    return list(
+        TournamentMatch.objects.filter(contestants__in=list(user.teams), is_final=False)
+        .values_list("pk", flat=True)
+        .distinct()
+    )
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Personal notifications, plus broadcasts to the tournaments and the
+    undecided matches of the user's teams.
+    """
+
+    channel_group_name = None
+    subscriptions = ()
+    presence_keys = ()
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+        self.channel_group_name = self.user.notifications_channel
+        self.subscriptions = [
+            self.channel_group_name,
+            *(TOURNAMENT_GROUP.format(pk) for pk in self.user.tournaments),
+            *(MATCH_GROUP.format(pk) for pk in await get_open_match_ids(self.user)),
+        ]
+        await asyncio.gather(
+            *(
+                self.channel_layer.group_add(group, self.channel_name)
+                for group in self.subscriptions
             )
-            self.send_initial_msg()
-        else:
-            self.close()
+        )
+        await self.accept()
+        await self.send(text_data=await get_initial_notifications(self.user))
+        self.presence_keys = [
+            *(presence.team_presence_key(pk) for pk in self.user.teams),
+            *(presence.tournament_presence_key(pk) for pk in self.user.tournaments),
+        ]
+        await presence.touch(self.user.pk, self.channel_name, self.presence_keys)
 
-    def disconnect(self, close_code):
-        async_to_sync(self.channel_layer.group_discard)(
-            self.channel_group_name, self.channel_name
+    async def disconnect(self, close_code):
+        if self.channel_group_name:
+            await presence.leave(self.user.pk, self.channel_name, self.presence_keys)
+        await asyncio.gather(
+            *(
+                self.channel_layer.group_discard(group, self.channel_name)
+                for group in self.subscriptions
+            )
         )
 
-    def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         text_data_json = json.loads(text_data)
+        if text_data_json.get("action") == "heartbeat":
+            await presence.touch(self.user.pk, self.channel_name, self.presence_keys)
+            return
+        if text_data_json.get("action") == "history":
+            cursor = parse_cursor(text_data_json.get("cursor"))
+            if cursor is None:
+                await self.send(text_data=json.dumps({"error": "Invalid cursor."}))
+                return
+            await self.send(text_data=await get_notification_history(self.user, cursor))
+            return
         message = text_data_json["message"]
 
-        async_to_sync(self.channel_layer.group_send)(
+        await self.channel_layer.group_send(
             self.channel_group_name, {"type": "notification", "message": message}
         )
 
-    def notification(self, event):
+    async def notification(self, event):
         message = event["message"]
 
-        self.send(text_data=json.dumps({"message": message}))
-
-    def __build_single_notification(self, obj):
-        if obj.meta.get("type") == NotificationTypes.INVITATION.value:
-            msg = {
-                "type": "notification",
-                "message": {
-                    "url": f"{settings.BASE_URL}"
-                    f"{reverse('tournaments:tournament_invitations-detail', kwargs={'pk': obj.meta['obj_pk']})}",
-                    "content": f"You have been invited to the team "
-                    f"{obj.meta['team_name']} in {obj.meta['tournament_name']} tournament.",
-                    "read": obj.read,
-                },
-            }
-        elif obj.meta.get("type") == NotificationTypes.INVITATION_REVOKE.value:
-            msg = {
-                "type": "notification",
-                "message": {
-                    "url": "",
-                    "message": "{} has denied your invitation to team {} in tournament {}".format(
-                        obj.meta["invited_user"],
-                        obj.meta["team_name"],
-                        obj.meta["tournament_name"],
-                    ),
-                },
-            }
-        else:
-            msg = {
-                "type": "notification",
-                "message": {
-                    "url": "",
-                    "message": f"Your invitation to the team {obj.meta['team_name']} "
-                    f"in {obj.meta['tournament_name']} tournament has been revoked.",
-                    "read": obj.read,
-                },
-            }
-        return msg
-
-    def send_initial_msg(self):
-        for notification in Notification.objects.filter(user=self.user).only(
-            "meta", "read"
-        ):
-            async_to_sync(self.channel_layer.group_send)(
-                self.channel_group_name, self.__build_single_notification(notification)
+        await self.send(text_data=json.dumps({"message": message}))
+
+
+class PreMatchChatConsumer(AsyncWebsocketConsumer):
+    channel_group_name = None
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+        channel_name = self.scope["url_route"]["kwargs"]["name"]
+        self.team = await get_lobby_team_name(channel_name, self.user.pk)
+        if self.team is None:
+            await self.close()
+            return
+        self.channel_group_name = channel_name
+        self.presence_key = presence.lobby_presence_key(channel_name)
+        await self.channel_layer.group_add(self.channel_group_name, self.channel_name)
+        await self.accept()
+        await self.touch_presence()
+        messages = await get_recent_lobby_messages(channel_name)
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "messages": messages,
+                    "cursor": messages[0]["id"]
+                    if len(messages) == LOBBY_CHAT_PAGE_SIZE
+                    else None,
+                    "online": await presence.get_online(self.presence_key),
+                    "heartbeat": presence.PRESENCE_HEARTBEAT,
+                }
             )
+        )
 
+    async def disconnect(self, close_code):
+        if self.channel_group_name:
+            if await presence.leave(
+                self.user.pk, self.channel_name, [self.presence_key]
+            ):
+                await self.send_presence("leave")
+            await self.channel_layer.group_discard(
+                self.channel_group_name, self.channel_name
+            )
 
-class PreMatchChatConsumer(WebsocketConsumer):
-    def connect(self):
-        self.user = get_user(self.scope)
-        if self.user.is_authenticated:
-            channel_name = self.scope["path"].split("/")[-2]
-            if check_match_lobby_eligibility(self.user, channel_name):
-                team = TournamentMatch.objects.filter(
-                    chat_channel=channel_name, contestants__team_members__user=self.user
-                ).first()
-                self.channel_group_name = channel_name
-                if team:
-                    self.team = team.name
-                else:
-                    self.close()
-                self.accept()
-                async_to_sync(self.channel_layer.group_add)(
-                    self.channel_group_name, self.channel_name
-                )
-
-            else:
-                self.close()
-        else:
-            self.close()
-
-    def disconnect(self, close_code):
-        async_to_sync(self.channel_layer.group_discard)(
-            self.channel_group_name, self.channel_name
+    async def touch_presence(self):
+        if await presence.touch(self.user.pk, self.channel_name, [self.presence_key]):
+            await self.send_presence("join")
+
+    async def send_presence(self, event):
+        await self.channel_layer.group_send(
+            self.channel_group_name,
+            {
+                "type": "presence_change",
+                "event": event,
+                "user": self.user.pk,
+                "team": self.team,
+            },
         )
 
-    def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         text_data_json = json.loads(text_data)
+        if text_data_json.get("action") == "heartbeat":
+            await self.touch_presence()
+            return
         message = text_data_json["message"]
+        message_id = await append_lobby_message(
+            self.channel_group_name, self.user, self.team, message
+        )
 
-        async_to_sync(self.channel_layer.group_send)(
+        await self.channel_layer.group_send(
             self.channel_group_name,
             {
                 "type": "chat_message",
+                "id": message_id,
                 "team": self.team,
                 "username": self.user.nickname,
                 "message": message,
             },
         )
 
-    def notification(self, event):
+    async def chat_message(self, event):
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "id": event["id"],
+                    "team": event["team"],
+                    "username": event["username"],
+                    "message": event["message"],
+                }
+            )
+        )
+
+    async def presence_change(self, event):
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "presence": {
+                        "event": event["event"],
+                        "user": event["user"],
+                        "team": event.get("team"),
+                    }
+                }
+            )
+        )
+
+    async def notification(self, event):
         message = event["message"]
 
-        self.send(text_data=json.dumps({"message": message}))
+        await self.send(text_data=json.dumps({"message": message}))
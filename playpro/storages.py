@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+class RenditionStorage(S3Boto3Storage):
+    # Rendition keys are content hashes, an object never changes once written.
+    object_parameters = {"CacheControl": "public, max-age=31536000, immutable"}
+    file_overwrite = True
+
+
+class PrivateStorage(S3Boto3Storage):
+    # Sensitive uploads, kept out of the public media bucket and only
+    # reachable through signed URLs.
+    bucket_name = settings.PRIVATE_STORAGE_BUCKET_NAME
+    default_acl = "private"
+    querystring_auth = True
+    file_overwrite = False
+
+
+def private_storage():
+    return get_storage_class(settings.PRIVATE_FILE_STORAGE)()
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from playpro import images
+from playpro.images import RenditionSpec, build_renditions, get_crop_box
+from playpro.sockets import NotificationConsumer, parse_cursor
+
+
+class RenditionsTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(directory.name)
+        patcher = mock.patch.object(images, "rendition_storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def render(self, im, spec):
+        source = BytesIO()
+        im.save(source, format="PNG")
+        source.seek(0)
+        renditions = build_renditions(source, spec)
+        return {
+            name: Image.open(self.storage.open(keys["jpeg"]))
+            for name, keys in renditions.items()
+        }
+
+    def test_crop_box_keeps_the_centre_at_the_target_ratio(self):
+        self.assertEqual(get_crop_box((400, 300), (16, 9)), (0, 37, 400, 262))
+        self.assertEqual(get_crop_box((300, 100), (16, 9)), (61, 0, 239, 100))
+        self.assertEqual(get_crop_box((160, 90), (16, 9)), (0, 0, 160, 90))
+
+    def test_cropped_rendition_is_not_stretched(self):
+        # A 4:3 source whose top and bottom bands fall outside a 16:9 crop.
+        im = Image.new("RGB", (400, 300), (0, 0, 255))
+        im.paste((255, 0, 0), (0, 30, 400, 270))
+        spec = RenditionSpec(sizes={"og": (160, 90)}, formats=("jpeg",), crop=True)
+        rendered = self.render(im, spec)["og"]
+        self.assertEqual(rendered.size, (160, 90))
+        for y in (0, 45, 89):
+            red, green, blue = rendered.getpixel((80, y))
+            self.assertGreater(red, 200)
+            self.assertLess(blue, 60)
+
+    def test_fitted_rendition_keeps_the_aspect_ratio(self):
+        im = Image.new("RGB", (400, 300), (255, 0, 0))
+        spec = RenditionSpec(sizes={"card": (160, 160)}, formats=("jpeg",), crop=False)
+        self.assertEqual(self.render(im, spec)["card"].size, (160, 120))
+
+    def test_transparency_is_flattened_onto_white(self):
+        im = Image.new("RGBA", (40, 40), (0, 0, 0, 0))
+        spec = RenditionSpec(sizes={"card": (40, 40)}, formats=("jpeg",), crop=False)
+        self.assertGreater(min(self.render(im, spec)["card"].getpixel((20, 20))), 245)
+
+
+class NotificationHistoryTestCase(SimpleTestCase):
+    def test_parse_cursor(self):
+        for value, cursor in (
+            (42, 42),
+            ("42", 42),
+            (None, None),
+            ("", None),
+            ("abc", None),
+            ([42], None),
+            ({"pk": 42}, None),
+            (True, None),
+            (0, None),
+            (-1, None),
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(parse_cursor(value), cursor)
+
+    def test_malformed_history_request_gets_an_error_frame(self):
+        consumer = NotificationConsumer()
+        consumer.send = mock.AsyncMock()
+        for request in ({"action": "history"}, {"action": "history", "cursor": "x"}):
+            with self.subTest(request=request):
+                consumer.send.reset_mock()
+                asyncio.run(consumer.receive(text_data=json.dumps(request)))
+                consumer.send.assert_awaited_once_with(
+                    text_data=json.dumps({"error": "Invalid cursor."})
+                )
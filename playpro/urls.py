@@ -29,6 +29,7 @@ urlpatterns = [
     ),
     path("users/", include("users.urls")),
     path("tournaments/", include("tournaments.urls")),
+    path("notifications/", include("notifications.urls")),
 ]
 
 websocket_urlpatterns = [
@@ -0,0 +1,288 @@
+import itertools
+import random
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import F
+
+from notifications.services import broadcast_to_tournament
+from tournaments.cache import bump_tournament_version
+from tournaments.lobbies import index_lobbies
+from tournaments.models import (
+    GroupStanding,
+    PlayoffRound,
+    TournamentGroup,
+    TournamentMatch,
+)
+
+PLAYOFF_ONLY_MAX_TEAMS = 16
+PLAYOFF_QUALIFIERS_PER_GROUP = 2
+BULK_BATCH_SIZE = 1000
+
+
+def get_division_value(team_count):
+    if team_count >= 64:
+        return 8
+    elif team_count >= 32:
+        return 8
+    else:
+        return 4
+
+
+def build_chunks(chunk_size, data):
+    final_chunks = []
+    remainder = len(data) % chunk_size
+    if remainder:
+        equal_part = len(data) - remainder
+        chunks_count = int(equal_part / chunk_size + 1)
+        for _ in range(chunks_count):
+            final_chunks.append([])
+        for _ in range(chunks_count):
+            for chunk in final_chunks:
+                try:
+                    chunk.append(data.pop(0))
+                except IndexError:
+                    break
+    else:
+        final_chunks = [
+            data[x : x + chunk_size] for x in range(0, len(data), chunk_size)
+        ]
+    return final_chunks
+
+
+class PlannedMatch(
+    namedtuple("PlannedMatch", "stage round_number teams bracket_position winner")
+):
+    @property
+    def is_bye(self):
+        return self.winner is not None
+
+
+class BracketLayout:
+    """
+    Group/playoff layout of a tournament computed in memory.
+
+    Nothing touches the database until ``save()``, which writes groups,
+    their standings, matches, playoff rounds and both M2M through tables with
+    a handful of bulk inserts.
+
+    The playoff is a binary tree: the match at ``bracket_position`` p of
+    round r is fed by positions 2p and 2p + 1 of round r - 1. Brackets are
+    padded to the next power of two with byes, a bye being an already
+    decided first round match with a single contestant.
+    """
+
+    def __init__(self, tournament):
+        self.tournament = tournament
+        self.groups = []
+        self.matches = []
+        self.rounds = []
+
+    @classmethod
+    def build(cls, tournament, teams):
+        layout = cls(tournament)
+        teams = list(teams)
+        random.shuffle(teams)
+        if len(teams) <= PLAYOFF_ONLY_MAX_TEAMS:
+            layout.add_playoff(teams)
+        else:
+            for chunk in build_chunks(get_division_value(len(teams)), teams):
+                layout.groups.append(chunk)
+                for team_pair in itertools.combinations(chunk, 2):
+                    layout.add_match(TournamentMatch.StageChoices.GROUP, team_pair)
+        return layout
+
+    def add_match(
+        self, stage, teams, round_number=None, bracket_position=None, winner=None
+    ):
+        self.matches.append(
+            PlannedMatch(stage, round_number, list(teams), bracket_position, winner)
+        )
+
+    def add_playoff(self, teams):
+        """Seed a playoff bracket, ``teams`` ordered from the best seed down."""
+        if len(teams) < 2:
+            return
+        size = 2
+        while size < len(teams):
+            size *= 2
+        byes = size - len(teams)
+        seeded = [[team] for team in teams[:byes]] + [
+            list(pair) for pair in zip(teams[byes::2], teams[byes + 1 :: 2])
+        ]
+        # Byes go to even positions first so they rarely meet each other.
+        positions = list(range(0, size // 2, 2)) + list(range(1, size // 2, 2))
+        first_round = {}
+        for position, seed in zip(positions, seeded):
+            first_round[position] = seed
+            self.add_match(
+                TournamentMatch.StageChoices.PLAYOFF,
+                seed,
+                round_number=1,
+                bracket_position=position,
+                winner=seed[0] if len(seed) == 1 else None,
+            )
+        for position in range(0, size // 2 - 1, 2):
+            left, right = first_round[position], first_round[position + 1]
+            if len(left) == len(right) == 1:
+                self.add_match(
+                    TournamentMatch.StageChoices.PLAYOFF,
+                    left + right,
+                    round_number=2,
+                    bracket_position=position // 2,
+                )
+        round_number, matches_count = 1, size // 2
+        while matches_count:
+            self.rounds.append(
+                PlayoffRound(
+                    tournament=self.tournament,
+                    round_number=round_number,
+                    matches_count=matches_count,
+                    decided_count=byes if round_number == 1 else 0,
+                )
+            )
+            round_number, matches_count = round_number + 1, matches_count // 2
+
+    @transaction.atomic
+    def save(self):
+        groups = TournamentGroup.objects.bulk_create(
+            [TournamentGroup(tournament=self.tournament) for _ in self.groups],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        TournamentGroup.teams.through.objects.bulk_create(
+            [
+                TournamentGroup.teams.through(
+                    tournamentgroup_id=group.pk, tournamentteam_id=team.pk
+                )
+                for group, teams in zip(groups, self.groups)
+                for team in teams
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        GroupStanding.objects.bulk_create(
+            [
+                GroupStanding(tournament=self.tournament, group=group, team=team)
+                for group, teams in zip(groups, self.groups)
+                for team in teams
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        matches = TournamentMatch.objects.bulk_create(
+            [
+                TournamentMatch(
+                    tournament=self.tournament,
+                    stage=planned.stage,
+                    round_number=planned.round_number,
+                    bracket_position=planned.bracket_position,
+                    winner=planned.winner,
+                    is_final=planned.is_bye,
+                )
+                for planned in self.matches
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        TournamentMatch.contestants.through.objects.bulk_create(
+            [
+                TournamentMatch.contestants.through(
+                    tournamentmatch_id=match.pk, tournamentteam_id=team.pk
+                )
+                for match, planned in zip(matches, self.matches)
+                for team in planned.teams
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        PlayoffRound.objects.bulk_create(self.rounds)
+        # Bulk inserts send no signals, publish the new layout explicitly.
+        tournament_id = self.tournament.pk
+        transaction.on_commit(lambda: bump_tournament_version(tournament_id))
+        transaction.on_commit(
+            lambda: broadcast_to_tournament(
+                tournament_id, {"event": "bracket_drawn", "tournament": tournament_id}
+            )
+        )
+        match_ids = [match.pk for match in matches]
+        transaction.on_commit(lambda: index_lobbies(match_ids))
+        return groups, matches
+
+
+def _group_score(team):
+    return team.wins - team.losses, team.wins
+
+
+def qualify_from_groups(tournament):
+    """
+    Teams advancing from the group stage, best seed first: every group
+    winner ranked by score, then every runner-up, and so on.
+    """
+    places = []
+    for group in tournament.tournament_groups.prefetch_related("teams"):
+        ranking = sorted(group.teams.all(), key=_group_score, reverse=True)
+        places.append(ranking[:PLAYOFF_QUALIFIERS_PER_GROUP])
+    qualifiers = []
+    for place in range(PLAYOFF_QUALIFIERS_PER_GROUP):
+        qualifiers += sorted(
+            (ranking[place] for ranking in places if len(ranking) > place),
+            key=_group_score,
+            reverse=True,
+        )
+    return qualifiers
+
+
+@transaction.atomic
+def advance_playoff(match):
+    """
+    Record a decided playoff match and open the next round match once its
+    sibling is decided too. Locks only the round counter row, so siblings
+    decided concurrently cannot both miss each other.
+    """
+    if match.bracket_position is None:
+        return None
+    playoff_round = (
+        PlayoffRound.objects.select_for_update()
+        .filter(tournament_id=match.tournament_id, round_number=match.round_number)
+        .first()
+    )
+    if playoff_round is None:
+        return None
+    PlayoffRound.objects.filter(pk=playoff_round.pk).update(
+        decided_count=F("decided_count") + 1
+    )
+    sibling_position = match.bracket_position ^ 1
+    feeders = [(match.bracket_position, match.winner_id)]
+    # Only brackets seeded by pk pairs (before bracket positions) have rounds
+    # of odd size, their last match advances alone through a bye.
+    if sibling_position < playoff_round.matches_count:
+        sibling_winner_id = (
+            TournamentMatch.objects.filter(
+                tournament_id=match.tournament_id,
+                stage=TournamentMatch.StageChoices.PLAYOFF,
+                round_number=match.round_number,
+                bracket_position=sibling_position,
+                is_final=True,
+            )
+            .values_list("winner_id", flat=True)
+            .first()
+        )
+        if sibling_winner_id is None:
+            return None
+        feeders.append((sibling_position, sibling_winner_id))
+    elif playoff_round.matches_count == 1:
+        return None
+    next_match, created = TournamentMatch.objects.get_or_create(
+        tournament_id=match.tournament_id,
+        stage=TournamentMatch.StageChoices.PLAYOFF,
+        round_number=match.round_number + 1,
+        bracket_position=match.bracket_position // 2,
+    )
+    if not created:
+        return next_match
+    next_match.contestants.add(*[winner_id for _, winner_id in sorted(feeders)])
+    if len(feeders) == 1:
+        # Decided in place like seeded byes, a single contestant has no loser
+        # to score.
+        next_match.winner_id, next_match.is_final = feeders[0][1], True
+        TournamentMatch.objects.filter(pk=next_match.pk).update(
+            winner_id=next_match.winner_id, is_final=True
+        )
+        return advance_playoff(next_match)
+    return next_match
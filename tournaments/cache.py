@@ -0,0 +1,167 @@
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.renderers import JSONRenderer
+
+from tournaments.models import TournamentGamePlatformMap, TournamentTeamMember
+
+TOURNAMENT_VERSION_KEY = "tournaments:version:{}"
+TOURNAMENT_RESPONSE_KEY = "tournaments:response:{}:{}:{}"
+TOURNAMENT_RESPONSE_TTL = 60 * 60
+TOURNAMENT_RESPONSE_MAX_AGE = 5
+ROSTERED_USERS_KEY = "tournaments:rostered:{}:{}"
+ROSTERED_USERS_TTL = 60 * 10
+
+
+class GamerTagTypesCache:
+    """
+    Gamer tag field names per (game, platform set).
+
+    Entries live in process memory for ``local_ttl`` seconds in front of the
+    shared Django cache (Redis). ``invalidate()`` bumps a shared version,
+    which retires every shared entry at once; other processes pick the new
+    version up within ``local_ttl``.
+    """
+
+    key_prefix = "tournaments:gamer-tag-types"
+    local_ttl = 60
+    shared_ttl = 60 * 60 * 24
+
+    def __init__(self):
+        self.local = {}
+        self.version = None
+        self.version_expires = 0
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def version_key(self):
+        return f"{self.key_prefix}:version"
+
+    def _get_version(self, now):
+        if self.version is None or now >= self.version_expires:
+            version = cache.get_or_set(self.version_key, time.time_ns, timeout=None)
+            if version != self.version:
+                self.local.clear()
+                self.version = version
+            self.version_expires = now + self.local_ttl
+        return self.version
+
+    def get(self, tournament):
+        now = time.monotonic()
+        platform_ids = tuple(
+            sorted(platform.pk for platform in tournament.platforms.all())
+        )
+        version = self._get_version(now)
+        key = (tournament.game_id, platform_ids)
+        entry = self.local.get(key)
+        if entry and entry[1] > now:
+            self.local_hits += 1
+            return entry[0]
+        shared_key = "{}:{}:{}:{}".format(
+            self.key_prefix,
+            version,
+            tournament.game_id,
+            ",".join(str(pk) for pk in platform_ids),
+        )
+        gamer_tag_types = cache.get(shared_key)
+        if gamer_tag_types is None:
+            self.misses += 1
+            gamer_tag_types = list(
+                TournamentGamePlatformMap.objects.filter(
+                    game_id=tournament.game_id, platform_id__in=platform_ids
+                ).values_list("gamer_tag_types__name", flat=True)
+            )
+            cache.set(shared_key, gamer_tag_types, timeout=self.shared_ttl)
+        else:
+            self.shared_hits += 1
+        self.local[key] = (gamer_tag_types, now + self.local_ttl)
+        return gamer_tag_types
+
+    def invalidate(self):
+        self.local.clear()
+        self.version = None
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), timeout=None)
+
+    def stats(self):
+        return {
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "local_entries": len(self.local),
+        }
+
+
+gamer_tag_types_cache = GamerTagTypesCache()
+
+
+def get_tournament_version(tournament_id):
+    return cache.get_or_set(
+        TOURNAMENT_VERSION_KEY.format(tournament_id), time.time_ns, timeout=None
+    )
+
+
+def bump_tournament_version(tournament_id):
+    key = TOURNAMENT_VERSION_KEY.format(tournament_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def tournament_versioned_response(view_method):
+    """
+    Cache the rendered body of a tournament detail action per tournament
+    version. The version doubles as a strong ETag, so a matching
+    ``If-None-Match`` gets a 304 without touching the database.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        tournament_id = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        version = get_tournament_version(tournament_id)
+        etag = f'"{tournament_id}-{view_method.__name__}-{version}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={TOURNAMENT_RESPONSE_MAX_AGE}",
+        }
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return HttpResponseNotModified(headers=headers)
+        key = TOURNAMENT_RESPONSE_KEY.format(
+            tournament_id, view_method.__name__, version
+        )
+        body = cache.get(key)
+        if body is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = JSONRenderer().render(response.data)
+            cache.set(key, body, TOURNAMENT_RESPONSE_TTL)
+        return HttpResponse(body, content_type="application/json", headers=headers)
+
+    return wrapper
+
+
+def get_rostered_user_ids(school_id, tournament_id):
+    """Ids of the ``school_id`` users already on a team of the tournament."""
+    key = ROSTERED_USERS_KEY.format(school_id, tournament_id)
+    user_ids = cache.get(key)
+    if user_ids is None:
+        user_ids = frozenset(
+            TournamentTeamMember.objects.filter(
+                team__tournament_id=tournament_id, user__school_id=school_id
+            ).values_list("user_id", flat=True)
+        )
+        cache.set(key, user_ids, ROSTERED_USERS_TTL)
+    return user_ids
+
+
+def invalidate_rostered_user_ids(school_id, tournament_id):
+    cache.delete(ROSTERED_USERS_KEY.format(school_id, tournament_id))
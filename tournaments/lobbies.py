@@ -0,0 +1,276 @@
+import logging
+
+from channels.db import database_sync_to_async
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+
+from playpro.redis import get_async_redis, get_redis
+from tournaments.models import LobbyMessage, TournamentMatch, TournamentTeamMember
+
+LOBBY_KEY = "tournaments:lobby:{}"
+LOBBY_TTL = 60 * 60 * 24 * 30
+LOBBY_CHAT_KEY = "tournaments:lobby-chat:{}"
+LOBBY_CHAT_FLUSHED_KEY = "tournaments:lobby-chat-flushed:{}"
+LOBBY_CHAT_PENDING_KEY = "tournaments:lobby-chat-pending"
+LOBBY_CHAT_MAXLEN = 1000
+LOBBY_CHAT_TTL = 60 * 60 * 24 * 7
+LOBBY_CHAT_PAGE_SIZE = 50
+LOBBY_CHAT_FLUSH_BATCH = 500
+# Keeps the hash of a lobby without members around, telling it apart from a
+# lobby that was never indexed or got evicted.
+LOBBY_MARKER = "-"
+
+logger = logging.getLogger(__name__)
+
+
+def index_lobbies(match_ids):
+    """
+    (Re)build the membership hash of every given match lobby, mapping user
+    ids to the name of the team they play for.
+    """
+    lobbies = {
+        chat_channel: {LOBBY_MARKER: ""}
+        for chat_channel in TournamentMatch.objects.filter(
+            pk__in=match_ids
+        ).values_list("chat_channel", flat=True)
+    }
+    if not lobbies:
+        return lobbies
+    for chat_channel, user_id, team_name in TournamentTeamMember.objects.filter(
+        team__matches__in=match_ids
+    ).values_list("team__matches__chat_channel", "user_id", "team__name"):
+        lobbies[chat_channel][user_id] = team_name
+    pipeline = get_redis().pipeline(transaction=False)
+    for chat_channel, members in lobbies.items():
+        key = LOBBY_KEY.format(chat_channel)
+        pipeline.delete(key)
+        pipeline.hset(key, mapping=members)
+        pipeline.expire(key, LOBBY_TTL)
+    pipeline.execute()
+    return lobbies
+
+
+def get_team_match_ids(team_ids):
+    return list(
+        TournamentMatch.objects.filter(contestants__in=team_ids)
+        .values_list("pk", flat=True)
+        .distinct()
+    )
+
+
+async def get_lobby_team_name(chat_channel, user_id):
+    """Name of the user's team in the match lobby, None if not a contestant."""
+    key = LOBBY_KEY.format(chat_channel)
+    team_name, marker = await get_async_redis().hmget(key, user_id, LOBBY_MARKER)
+    if marker is None:
+        lobbies = await database_sync_to_async(_index_lobby)(chat_channel)
+        team_name = lobbies.get(chat_channel, {}).get(user_id)
+    return team_name
+
+
+def _index_lobby(chat_channel):
+    return index_lobbies(
+        list(
+            TournamentMatch.objects.filter(chat_channel=chat_channel).values_list(
+                "pk", flat=True
+            )
+        )
+    )
+
+
+def parse_message_id(message_id):
+    sent_at_ms, sequence = str(message_id).split("-")
+    return int(sent_at_ms), int(sequence)
+
+
+def _stream_message(message_id, fields):
+    return {
+        "id": message_id,
+        "team": fields["team"],
+        "username": fields["username"],
+        "message": fields["message"],
+    }
+
+
+async def append_lobby_message(chat_channel, user, team_name, message):
+    """
+    Append a chat message to the lobby stream and return its id. Streams
+    are flushed to ``LobbyMessage`` rows by ``flush_lobby_messages``.
+    """
+    key = LOBBY_CHAT_KEY.format(chat_channel)
+    pipeline = get_async_redis().pipeline(transaction=False)
+    pipeline.xadd(
+        key,
+        {
+            "user_id": user.pk,
+            "username": user.nickname,
+            "team": team_name,
+            "message": message,
+        },
+        maxlen=LOBBY_CHAT_MAXLEN,
+        approximate=True,
+    )
+    pipeline.expire(key, LOBBY_CHAT_TTL)
+    pipeline.sadd(LOBBY_CHAT_PENDING_KEY, chat_channel)
+    message_id, *_ = await pipeline.execute()
+    return message_id
+
+
+async def get_recent_lobby_messages(chat_channel, count=LOBBY_CHAT_PAGE_SIZE):
+    """
+    Last ``count`` messages of the lobby, oldest first. A stream shorter
+    than that (new, or recreated after expiring) is topped up with older
+    flushed messages, so a short page means there is no more history.
+    """
+    entries = await get_async_redis().xrevrange(
+        LOBBY_CHAT_KEY.format(chat_channel), count=count
+    )
+    messages = [_stream_message(*entry) for entry in reversed(entries)]
+    if len(messages) < count:
+        messages = (
+            await database_sync_to_async(_get_flushed_lobby_messages)(
+                chat_channel,
+                messages[0]["id"] if messages else None,
+                count - len(messages),
+            )
+            + messages
+        )
+    return messages
+
+
+def _get_flushed_lobby_messages(chat_channel, before, count):
+    return get_lobby_messages(
+        TournamentMatch.objects.filter(chat_channel=chat_channel).first(),
+        before=before,
+        count=count,
+    )
+
+
+def get_lobby_messages(match, before=None, count=LOBBY_CHAT_PAGE_SIZE):
+    """Up to ``count`` flushed messages older than ``before``, oldest first."""
+    if match is None:
+        return []
+    queryset = LobbyMessage.objects.filter(match=match)
+    if before:
+        sent_at_ms, sequence = parse_message_id(before)
+        queryset = queryset.filter(
+            Q(sent_at_ms__lt=sent_at_ms)
+            | Q(sent_at_ms=sent_at_ms, sequence__lt=sequence)
+        )
+    messages = queryset.order_by("-sent_at_ms", "-sequence")[:count]
+    return [
+        {
+            "id": message.message_id,
+            "team": message.team_name,
+            "username": message.username,
+            "message": message.message,
+        }
+        for message in reversed(messages)
+    ]
+
+
+def build_lobby_messages(match_id, entries):
+    username_length = LobbyMessage._meta.get_field("username").max_length
+    team_name_length = LobbyMessage._meta.get_field("team_name").max_length
+    messages = []
+    for message_id, fields in entries:
+        sent_at_ms, sequence = parse_message_id(message_id)
+        messages.append(
+            LobbyMessage(
+                match_id=match_id,
+                user_id=fields["user_id"],
+                username=fields["username"][:username_length],
+                team_name=fields["team"][:team_name_length],
+                message=fields["message"],
+                sent_at_ms=sent_at_ms,
+                sequence=sequence,
+            )
+        )
+    return messages
+
+
+def write_lobby_messages(lobbies):
+    """
+    Insert the ``{chat_channel: messages}`` batch, falling back to one
+    insert per lobby when it fails. Returns the lobbies that failed.
+    """
+    # Ids are unique per match, a retried flush cannot duplicate rows.
+    try:
+        with transaction.atomic():
+            LobbyMessage.objects.bulk_create(
+                [message for messages in lobbies.values() for message in messages],
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+        return []
+    except DatabaseError:
+        logger.exception("Lobby chat batch flush failed, flushing lobby by lobby.")
+    failed = []
+    for chat_channel, messages in lobbies.items():
+        try:
+            with transaction.atomic():
+                LobbyMessage.objects.bulk_create(
+                    messages, batch_size=1000, ignore_conflicts=True
+                )
+        except DatabaseError:
+            logger.exception("Lobby chat flush failed for %s.", chat_channel)
+            failed.append(chat_channel)
+    return failed
+
+
+def flush_lobby_messages():
+    """
+    Copy new stream entries of lobbies with pending messages to
+    ``LobbyMessage``. A lobby whose rows cannot be written goes back to the
+    pending set without holding back the others. Returns the number of rows
+    written.
+    """
+    client = get_redis()
+    chat_channels = client.spop(LOBBY_CHAT_PENDING_KEY, LOBBY_CHAT_FLUSH_BATCH)
+    if not chat_channels:
+        return 0
+    try:
+        matches = dict(
+            TournamentMatch.objects.filter(chat_channel__in=chat_channels).values_list(
+                "chat_channel", "pk"
+            )
+        )
+        flushed = client.mget(
+            [
+                LOBBY_CHAT_FLUSHED_KEY.format(chat_channel)
+                for chat_channel in chat_channels
+            ]
+        )
+        pipeline = client.pipeline(transaction=False)
+        for chat_channel, last_id in zip(chat_channels, flushed):
+            if last_id:
+                sent_at_ms, sequence = parse_message_id(last_id)
+                start = f"{sent_at_ms}-{sequence + 1}"
+            else:
+                start = "-"
+            pipeline.xrange(LOBBY_CHAT_KEY.format(chat_channel), min=start)
+        lobbies = {}
+        last_ids = {}
+        for chat_channel, entries in zip(chat_channels, pipeline.execute()):
+            if not entries or chat_channel not in matches:
+                continue
+            last_ids[chat_channel] = entries[-1][0]
+            lobbies[chat_channel] = build_lobby_messages(matches[chat_channel], entries)
+        failed = write_lobby_messages(lobbies)
+    except Exception:
+        client.sadd(LOBBY_CHAT_PENDING_KEY, *chat_channels)
+        raise
+    pipeline = client.pipeline(transaction=False)
+    if failed:
+        pipeline.sadd(LOBBY_CHAT_PENDING_KEY, *failed)
+    for chat_channel, last_id in last_ids.items():
+        if chat_channel not in failed:
+            pipeline.set(
+                LOBBY_CHAT_FLUSHED_KEY.format(chat_channel), last_id, ex=LOBBY_CHAT_TTL
+            )
+    pipeline.execute()
+    return sum(
+        len(messages)
+        for chat_channel, messages in lobbies.items()
+        if chat_channel not in failed
+    )
@@ -0,0 +1,104 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tournaments.brackets import (
+    PLAYOFF_ONLY_MAX_TEAMS,
+    BracketLayout,
+    build_chunks,
+    get_division_value,
+)
+from tournaments.factories import TournamentTeamFactory
+from tournaments.models import Tournament, TournamentGroup, TournamentMatch
+from users.factories import SchoolFactory
+
+
+def materialize_per_row(tournament, teams):
+    """Row-by-row writes, as create_tournament_groups_or_ladder used to do."""
+    teams = list(teams)
+    random.shuffle(teams)
+    if len(teams) <= PLAYOFF_ONLY_MAX_TEAMS:
+        for chunk in build_chunks(2, teams):
+            obj = TournamentMatch.objects.create(
+                tournament=tournament,
+                stage=TournamentMatch.StageChoices.PLAYOFF,
+                round_number=1,
+            )
+            for team in chunk:
+                obj.contestants.add(team)
+            obj.save()
+        return
+    for chunk in build_chunks(get_division_value(len(teams)), teams):
+        group = TournamentGroup.objects.create(tournament=tournament)
+        for item in chunk:
+            group.teams.add(item)
+        for team_pair in itertools.combinations(chunk, 2):
+            obj = TournamentMatch.objects.create(
+                tournament=tournament, stage=TournamentMatch.StageChoices.GROUP
+            )
+            for team in team_pair:
+                obj.contestants.add(team)
+
+
+def materialize_bulk(tournament, teams):
+    BracketLayout.build(tournament, teams).save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds tournaments through tournaments.factories and compares query count "
+        "and wall time of per-row vs bulk bracket materialization. "
+        "All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[64, 256, 1024])
+
+    def _seed(self, team_count):
+        school = SchoolFactory()
+        now = timezone.now()
+        # bulk_create skips Tournament.save(), the seed has no logo to process.
+        (tournament,) = Tournament.objects.bulk_create(
+            [
+                Tournament(
+                    name=f"Benchmark {team_count}",
+                    registration_open_date=now - timedelta(days=7),
+                    registration_close_date=now + timedelta(days=1),
+                    registration_check_in_date=now,
+                    team_size=1,
+                )
+            ]
+        )
+        teams = TournamentTeamFactory.create_batch(
+            team_count,
+            school=school,
+            tournament=tournament,
+            name=f"Team {team_count}",
+            captain__school=school,
+        )
+        return tournament, teams
+
+    def handle(self, *args, **options):
+        for team_count in options["sizes"]:
+            for label, materialize in (
+                ("per-row", materialize_per_row),
+                ("bulk", materialize_bulk),
+            ):
+                with transaction.atomic():
+                    tournament, teams = self._seed(team_count)
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        materialize(tournament, teams)
+                        elapsed = time.perf_counter() - start
+                    transaction.set_rollback(True)
+                self.stdout.write(
+                    f"{team_count:>5} teams  {label:<8} "
+                    f"{len(queries.captured_queries):>6} queries  "
+                    f"{elapsed * 1000:>10.1f} ms"
+                )
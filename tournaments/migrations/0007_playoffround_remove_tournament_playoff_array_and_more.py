@@ -0,0 +1,63 @@
+# Generated by Django 4.0.3 on 2026-10-18 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "tournaments",
+            "0006_gamertagchoice_tournamentgame_tournament_match_logo_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlayoffRound",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("round_number", models.IntegerField()),
+                ("matches_count", models.IntegerField()),
+                ("decided_count", models.IntegerField(default=0)),
+                (
+                    "tournament",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="playoff_rounds",
+                        to="tournaments.tournament",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("tournament", "round_number")},
+            },
+        ),
+        migrations.RemoveField(
+            model_name="tournament",
+            name="playoff_array",
+        ),
+        migrations.AddField(
+            model_name="tournamentmatch",
+            name="bracket_position",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="tournamentmatch",
+            index=models.Index(
+                fields=["tournament", "stage", "round_number", "bracket_position"],
+                name="tournaments_tournam_60a703_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0007_playoffround_remove_tournament_playoff_array_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tournament",
+            name="logo_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.3 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0008_tournament_logo_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tournament",
+            name="match_logo_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="tournament",
+            name="tournament_img_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="tournamentmatch",
+            name="contest_screenshot_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
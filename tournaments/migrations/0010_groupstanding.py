@@ -0,0 +1,88 @@
+# Generated by Django 4.0.3 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_group_standings(apps, schema_editor):
+    TournamentGroup = apps.get_model("tournaments", "TournamentGroup")
+    GroupStanding = apps.get_model("tournaments", "GroupStanding")
+    GroupStanding.objects.bulk_create(
+        [
+            GroupStanding(
+                tournament_id=group.tournament_id,
+                group=group,
+                team=team,
+                wins=team.wins,
+                losses=team.losses,
+                points=team.wins - team.losses,
+            )
+            for group in TournamentGroup.objects.prefetch_related("teams")
+            for team in group.teams.all()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0009_tournament_match_logo_renditions_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupStanding",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("wins", models.IntegerField(default=0)),
+                ("losses", models.IntegerField(default=0)),
+                ("points", models.IntegerField(default=0)),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="standings",
+                        to="tournaments.tournamentgroup",
+                    ),
+                ),
+                (
+                    "team",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="group_standings",
+                        to="tournaments.tournamentteam",
+                    ),
+                ),
+                (
+                    "tournament",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="group_standings",
+                        to="tournaments.tournament",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("group", "team")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="groupstanding",
+            index=models.Index(
+                fields=["tournament", "group", "-points", "-wins", "losses"],
+                name="tournaments_tournam_3668e6_idx",
+            ),
+        ),
+        migrations.RunPython(create_group_standings, migrations.RunPython.noop),
+    ]
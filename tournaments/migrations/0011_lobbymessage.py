@@ -0,0 +1,66 @@
+# Generated by Django 4.0.3 on 2026-10-18 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import tournaments.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tournaments", "0010_groupstanding"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tournamentmatch",
+            name="chat_channel",
+            field=models.CharField(
+                db_index=True,
+                default=tournaments.models.create_match_chat,
+                max_length=15,
+            ),
+        ),
+        migrations.CreateModel(
+            name="LobbyMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("username", models.CharField(max_length=20)),
+                ("team_name", models.CharField(max_length=20)),
+                ("message", models.TextField()),
+                ("sent_at_ms", models.BigIntegerField()),
+                ("sequence", models.IntegerField()),
+                (
+                    "match",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lobby_messages",
+                        to="tournaments.tournamentmatch",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("match", "sent_at_ms", "sequence")},
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.0.3 on 2026-10-18 14:05
+
+from django.db import migrations
+
+PLAYOFF = "playoff"
+
+
+def backfill_playoff_brackets(apps, schema_editor):
+    """
+    Give playoffs seeded before 0007 their bracket positions and round
+    counters. Those rounds were paired by pk, so the pk order within a round
+    is the bracket order. Pairs decided while the old sweep was pending get
+    their next round match, as advance_playoff would have created it.
+    """
+    TournamentMatch = apps.get_model("tournaments", "TournamentMatch")
+    PlayoffRound = apps.get_model("tournaments", "PlayoffRound")
+    tournament_ids = (
+        TournamentMatch.objects.filter(
+            stage=PLAYOFF,
+            bracket_position__isnull=True,
+            round_number__isnull=False,
+        )
+        .exclude(tournament__playoff_rounds__isnull=False)
+        .values_list("tournament_id", flat=True)
+        .distinct()
+    )
+    for tournament_id in list(tournament_ids):
+        rounds = {}
+        for match in TournamentMatch.objects.filter(
+            tournament_id=tournament_id, stage=PLAYOFF, round_number__isnull=False
+        ).order_by("round_number", "pk"):
+            rounds.setdefault(match.round_number, []).append(match)
+        for matches in rounds.values():
+            for position, match in enumerate(matches):
+                match.bracket_position = position
+            TournamentMatch.objects.bulk_update(matches, ["bracket_position"])
+        round_number, matches_count = min(rounds), len(rounds[min(rounds)])
+        while True:
+            matches = rounds.setdefault(round_number, [])
+            if matches_count > 1:
+                by_position = {match.bracket_position: match for match in matches}
+                next_matches = rounds.setdefault(round_number + 1, [])
+                next_positions = {match.bracket_position for match in next_matches}
+                for position in range(0, matches_count, 2):
+                    feeders = [
+                        by_position.get(feeder)
+                        for feeder in (position, position + 1)
+                        if feeder < matches_count
+                    ]
+                    if position // 2 in next_positions or not all(
+                        feeder and feeder.is_final and feeder.winner_id
+                        for feeder in feeders
+                    ):
+                        continue
+                    # A lone feeder advances through a bye, decided up front.
+                    next_match = TournamentMatch.objects.create(
+                        tournament_id=tournament_id,
+                        stage=PLAYOFF,
+                        round_number=round_number + 1,
+                        bracket_position=position // 2,
+                        winner_id=feeders[0].winner_id if len(feeders) == 1 else None,
+                        is_final=len(feeders) == 1,
+                    )
+                    next_match.contestants.add(
+                        *[feeder.winner_id for feeder in feeders]
+                    )
+                    next_matches.append(next_match)
+            PlayoffRound.objects.create(
+                tournament_id=tournament_id,
+                round_number=round_number,
+                matches_count=matches_count,
+                decided_count=sum(match.is_final for match in matches),
+            )
+            if matches_count <= 1:
+                break
+            round_number, matches_count = round_number + 1, (matches_count + 1) // 2
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0011_lobbymessage"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_playoff_brackets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.3 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0012_backfill_playoff_brackets"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="lobbymessage",
+            name="team_name",
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="lobbymessage",
+            name="username",
+            field=models.CharField(max_length=510),
+        ),
+    ]
@@ -1,16 +1,14 @@
-import sys
 import uuid
-from io import BytesIO
 
-from PIL import Image
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
-from django.core.files.storage import default_storage
-from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.db import models
+from django.db.models import F
 from shortuuid import ShortUUID
 
-from playpro.abstract import TimestampAbstractModel
+from playpro.abstract import ImageRenditionsMixin, TimestampAbstractModel
+from playpro.images import DEFAULT_RENDITIONS, RenditionSpec
+from tournaments.signals import match_decided
 from tournaments.validators import ImageSizeValidator
 from users.models import School, User
 from django.utils.translation import gettext_lazy as _
@@ -60,13 +58,18 @@ class TournamentGamePlatformMap(TimestampAbstractModel, models.Model):
         return f"{self.platform.name} - {self.game.name}"
 
 
-class Tournament(TimestampAbstractModel, models.Model):
+class Tournament(ImageRenditionsMixin, TimestampAbstractModel, models.Model):
     OG_IMAGE_WIDTH = 960
     OG_IMAGE_HEIGHT = 540
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.initial_logo = self.logo
+    RENDITIONS = {
+        "logo": RenditionSpec(
+            sizes={"og": (OG_IMAGE_WIDTH, OG_IMAGE_HEIGHT)},
+            formats=("jpeg",),
+            crop=True,
+        ),
+        "tournament_img": DEFAULT_RENDITIONS,
+        "match_logo": DEFAULT_RENDITIONS,
+    }
 
     registration_open_date = models.DateTimeField()
     registration_close_date = models.DateTimeField()
@@ -79,37 +82,14 @@ class Tournament(TimestampAbstractModel, models.Model):
     platforms = models.ManyToManyField(TournamentPlatform)
     team_size = models.PositiveIntegerField()
     game = models.ForeignKey(TournamentGame, null=True, on_delete=models.PROTECT)
-    playoff_array = ArrayField(
-        ArrayField(models.IntegerField(), size=2), size=8, null=True, blank=True
-    )
     match_logo = models.FileField(blank=True, null=True)
+    logo_renditions = models.JSONField(default=dict, blank=True)
+    tournament_img_renditions = models.JSONField(default=dict, blank=True)
+    match_logo_renditions = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"{self.game} | {self.name} | {' '.join([str(x) for x in self.platforms.all()])}"
 
-    def save(self, *args, **kwargs):
-        if not self.logo or self.logo != self.initial_logo:
-            unique_name = str(uuid.uuid4())
-            filename = f"{unique_name}.jpg"
-            im = Image.open(self.logo)
-            im.load()
-            original_image = BytesIO()
-            im.save(original_image, format="JPEG", quality=85)
-            default_storage.save("pokazrybe-original/" + filename, original_image)
-            output = BytesIO()
-            im = im.resize((self.OG_IMAGE_WIDTH, self.OG_IMAGE_HEIGHT))
-            im.save(output, format="JPEG", quality=85)
-            output.seek(0)
-            self.image = InMemoryUploadedFile(
-                output,
-                "ImageField",
-                f"{unique_name}.jpg",
-                "image/jpeg",
-                sys.getsizeof(output),
-                None,
-            )
-        super().save(*args, **kwargs)
-
 
 class TournamentTeam(TimestampAbstractModel, models.Model):
 
@@ -127,11 +107,16 @@ class TournamentTeam(TimestampAbstractModel, models.Model):
     class Meta:
         unique_together = ("captain", "tournament")
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial_name = self.__dict__.get("name")
+
     def save(self, *args, **kwargs):
         should_create_captain = False
         if not self.pk:
             should_create_captain = True
         super().save(*args, **kwargs)
+        self.initial_name = self.name
         if should_create_captain:
             TournamentTeamMember.objects.create(
                 user=self.captain, invitation_accepted=True, team=self
@@ -160,7 +145,32 @@ class TournamentGroup(TimestampAbstractModel, models.Model):
     teams = models.ManyToManyField(TournamentTeam)
 
 
-class TournamentMatch(TimestampAbstractModel, models.Model):
+class GroupStanding(TimestampAbstractModel, models.Model):
+    """Group table row of a team, kept current by TournamentMatch._update_teams_score."""
+
+    tournament = models.ForeignKey(
+        Tournament, on_delete=models.PROTECT, related_name="group_standings"
+    )
+    group = models.ForeignKey(
+        TournamentGroup, on_delete=models.PROTECT, related_name="standings"
+    )
+    team = models.ForeignKey(
+        TournamentTeam, on_delete=models.CASCADE, related_name="group_standings"
+    )
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("group", "team")
+        indexes = [
+            models.Index(fields=["tournament", "group", "-points", "-wins", "losses"]),
+        ]
+
+
+class TournamentMatch(ImageRenditionsMixin, TimestampAbstractModel, models.Model):
+    RENDITIONS = {"contest_screenshot": DEFAULT_RENDITIONS}
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.initial_winner = self.winner
@@ -186,26 +196,43 @@ class TournamentMatch(TimestampAbstractModel, models.Model):
         null=True,
         validators=[ImageSizeValidator(3)],
     )
+    contest_screenshot_renditions = models.JSONField(default=dict, blank=True)
     contestants = models.ManyToManyField(TournamentTeam, related_name="matches")
     round_number = models.IntegerField(blank=True, null=True)
+    bracket_position = models.IntegerField(blank=True, null=True)
     chat_channel = models.CharField(
         default=create_match_chat,
         max_length=15,
+        db_index=True,
     )
     place_finished = models.IntegerField(blank=True, null=True)
     result_submitted = ArrayField(
         models.IntegerField(), size=2, blank=True, default=list
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tournament", "stage", "round_number", "bracket_position"]
+            ),
+        ]
+
     # def __str__(self):
     #     return f'{self.tournament} | {" - ".join(self.contestants.values_list("name", flat=True))}'
 
     def _update_teams_score(self):
         self.winner.wins += 1
         self.winner.save()
-        loser = [x for x in self.contestants.all() if x is not self.winner][0]
+        loser = [x for x in self.contestants.all() if x.pk != self.winner.pk][0]
         loser.losses += 1
         loser.save()
+        if self.stage == self.StageChoices.GROUP:
+            GroupStanding.objects.filter(team=self.winner).update(
+                wins=F("wins") + 1, points=F("points") + 1
+            )
+            GroupStanding.objects.filter(team=loser).update(
+                losses=F("losses") + 1, points=F("points") - 1
+            )
 
     def save(self, *args, **kwargs):
         if self.place_finished:
@@ -219,10 +246,57 @@ class TournamentMatch(TimestampAbstractModel, models.Model):
                 and not self.is_contested
             ):
                 self.is_final = True
-            if not self.initial_is_final and self.is_final:
+            decided = not self.initial_is_final and self.is_final
+            if decided:
                 self._update_teams_score()
             super().save(*args, **kwargs)
+            if decided:
+                self.initial_is_final = True
+                match_decided.send(sender=self.__class__, instance=self)
 
     def has_submitted_result(self, user):
         user_team = self.contestants.filter(team_members__user=user).first()
         return getattr(user_team, "pk", None) in self.result_submitted
+
+
+class PlayoffRound(TimestampAbstractModel, models.Model):
+    """Progress counter of one playoff round, bumped as its matches get decided."""
+
+    tournament = models.ForeignKey(
+        Tournament, on_delete=models.PROTECT, related_name="playoff_rounds"
+    )
+    round_number = models.IntegerField()
+    matches_count = models.IntegerField()
+    decided_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("tournament", "round_number")
+
+    @property
+    def is_complete(self):
+        return self.decided_count >= self.matches_count
+
+
+class LobbyMessage(TimestampAbstractModel, models.Model):
+    """
+    Match lobby chat message flushed from its Redis stream. ``sent_at_ms``
+    and ``sequence`` are the two parts of the stream entry id.
+    """
+
+    match = models.ForeignKey(
+        TournamentMatch, on_delete=models.CASCADE, related_name="lobby_messages"
+    )
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    # As wide as the nickname and team name columns actually are.
+    username = models.CharField(max_length=510)
+    team_name = models.CharField(max_length=255)
+    message = models.TextField()
+    sent_at_ms = models.BigIntegerField()
+    sequence = models.IntegerField()
+
+    class Meta:
+        unique_together = ("match", "sent_at_ms", "sequence")
+
+    @property
+    def message_id(self):
+        return f"{self.sent_at_ms}-{self.sequence}"
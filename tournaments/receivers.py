@@ -1,38 +1,118 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from tournaments.models import TournamentMatch
-from tournaments.tasks import build_chunks
+from notifications.services import broadcast_to_match
+from tournaments.brackets import advance_playoff
+from tournaments.cache import (
+    bump_tournament_version,
+    gamer_tag_types_cache,
+    invalidate_rostered_user_ids,
+)
+from tournaments.lobbies import get_team_match_ids, index_lobbies
+from tournaments.models import (
+    GamerTagChoice,
+    Tournament,
+    TournamentGamePlatformMap,
+    TournamentMatch,
+    TournamentTeam,
+    TournamentTeamMember,
+)
+from tournaments.signals import match_decided
+from tournaments.tasks import schedule_stage_transition
+from users.models import User
 
 
-@receiver(post_save, sender=TournamentMatch)
+@receiver(match_decided, sender=TournamentMatch)
 def playoff_handler(sender, instance, **kwargs):
-    # round_nr: games_until_stage_finished
-    rounds_map = {1: 8, 2: 4, 3: 2}
-    if instance.tournament.tournament_matches.filter(
-        winner__isnull=False
-    ).count() == rounds_map.get(instance.round_number):
-        round_number = instance.round_number + 1
-        winners = []
-        for pair in instance.tournament.playoff_array:
-            for team in pair:
-                match = team.matches.get(
-                    tournament=instance.tournament, round_number=instance.round_number
-                )
-                if match.winner == team:
-                    winners.append(team)
-        chunks = build_chunks(2, winners)
-        for chunk in chunks:
-            obj = TournamentMatch.objects.create(
-                tournament=instance.tournament,
-                stage=TournamentMatch.StageChoices.PLAYOFF,
-                round_number=round_number,
-            )
-            for team in chunk:
-                obj.add(team)
-                obj.save()
+    if instance.stage == TournamentMatch.StageChoices.PLAYOFF:
+        advance_playoff(instance)
+
+
+@receiver(match_decided, sender=TournamentMatch)
+def stage_transition_handler(sender, instance, **kwargs):
+    if instance.stage == TournamentMatch.StageChoices.GROUP:
+        tournament_id = instance.tournament_id
+        transaction.on_commit(lambda: schedule_stage_transition(tournament_id))
+
+
+@receiver(match_decided, sender=TournamentMatch)
+def match_broadcast_handler(sender, instance, **kwargs):
+    payload = {
+        "event": "match_decided",
+        "match": instance.pk,
+        "winner": instance.winner_id,
+    }
+    transaction.on_commit(lambda: broadcast_to_match(payload["match"], payload))
 
 
 @receiver(pre_save, sender=TournamentMatch)
 def update_team_wins_and_looses(sender, instance, **kwargs):
     pass
+
+
+@receiver(post_save, sender=GamerTagChoice)
+@receiver(post_delete, sender=GamerTagChoice)
+@receiver(post_save, sender=TournamentGamePlatformMap)
+@receiver(post_delete, sender=TournamentGamePlatformMap)
+@receiver(m2m_changed, sender=TournamentGamePlatformMap.gamer_tag_types.through)
+@receiver(m2m_changed, sender=Tournament.platforms.through)
+def invalidate_gamer_tag_types(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        gamer_tag_types_cache.invalidate()
+
+
+@receiver(post_save, sender=TournamentMatch)
+@receiver(post_delete, sender=TournamentMatch)
+@receiver(post_save, sender=TournamentTeam)
+def tournament_version_handler(sender, instance, **kwargs):
+    tournament_id = instance.tournament_id
+    transaction.on_commit(lambda: bump_tournament_version(tournament_id))
+
+
+@receiver(m2m_changed, sender=TournamentMatch.contestants.through)
+def lobby_contestants_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        match_ids = [instance.pk]
+    elif action == "pre_clear":
+        match_ids = get_team_match_ids([instance.pk])
+    else:
+        match_ids = list(pk_set)
+    transaction.on_commit(lambda: index_lobbies(match_ids))
+
+
+@receiver(post_save, sender=TournamentTeamMember)
+@receiver(post_delete, sender=TournamentTeamMember)
+def lobby_roster_handler(sender, instance, **kwargs):
+    match_ids = get_team_match_ids([instance.team_id])
+    if match_ids:
+        transaction.on_commit(lambda: index_lobbies(match_ids))
+
+
+@receiver(post_save, sender=TournamentTeam)
+def lobby_team_name_handler(sender, instance, created, **kwargs):
+    if created or instance.name == instance.initial_name:
+        return
+    match_ids = get_team_match_ids([instance.pk])
+    if match_ids:
+        transaction.on_commit(lambda: index_lobbies(match_ids))
+
+
+@receiver(post_save, sender=TournamentTeamMember)
+@receiver(post_delete, sender=TournamentTeamMember)
+def rostered_users_handler(sender, instance, **kwargs):
+    school_id = (
+        User.objects.filter(pk=instance.user_id)
+        .values_list("school_id", flat=True)
+        .first()
+    )
+    tournament_id = (
+        TournamentTeam.objects.filter(pk=instance.team_id)
+        .values_list("tournament_id", flat=True)
+        .first()
+    )
+    transaction.on_commit(
+        lambda: invalidate_rostered_user_ids(school_id, tournament_id)
+    )
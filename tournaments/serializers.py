@@ -2,26 +2,24 @@ import logging
 from datetime import datetime, timedelta
 
 import pytz
-from django.db.models import Sum, F
 from rest_framework import serializers
 
+from playpro.images import rendition_urls
 from tournaments.models import (
+    GroupStanding,
     Tournament,
     TournamentTeam,
     TournamentTeamMember,
-    TournamentGroup,
     TournamentMatch,
-    TournamentGamePlatformMap,
 )
+from tournaments.cache import gamer_tag_types_cache
 from django.utils.translation import gettext_lazy as _
 
 logger = logging.getLogger(__name__)
 
 
 def get_gamer_tag_educated_guess(tournament):
-    return TournamentGamePlatformMap.objects.filter(
-        game=tournament.game, platform__in=tournament.platforms.all()
-    ).values_list("gamer_tag_types__name", flat=True)
+    return gamer_tag_types_cache.get(tournament)
 
 
 class TournamentListSerializer(serializers.ModelSerializer):
@@ -137,6 +135,7 @@ class TeamMemberSerializer(serializers.ModelSerializer):
     email = serializers.CharField(source="user.school_email", read_only=True)
     is_captain = serializers.SerializerMethodField()
     avatar = serializers.URLField(source="user.avatar.image.url", read_only=True)
+    avatar_renditions = serializers.SerializerMethodField()
     invitation_accepted = serializers.SerializerMethodField()
     user_id = serializers.IntegerField(source="user.pk", read_only=True)
     gamer_id = serializers.SerializerMethodField()
@@ -149,33 +148,49 @@ class TeamMemberSerializer(serializers.ModelSerializer):
             "email",
             "is_captain",
             "avatar",
+            "avatar_renditions",
             "invitation_accepted",
             "gamer_id",
         )
         read_only_fields = fields
 
     def get_is_captain(self, obj):
-        return obj.team.captain == obj.user
+        return obj.team.captain_id == obj.user_id
+
+    def get_avatar_renditions(self, obj):
+        avatar = obj.user.avatar
+        return rendition_urls(avatar.image_renditions) if avatar else {}
 
     def get_invitation_accepted(self, obj):
         mapping = {None: "pending", False: "rejected", True: "accepted"}
         return mapping[obj.invitation_accepted]
 
+    def _get_gamer_tag_types(self, tournament):
+        # Shared through the root serializer context: one lookup per tournament
+        # instead of one per rendered team member.
+        gamer_tag_types = self.context.setdefault("gamer_tag_types", {})
+        if tournament.pk not in gamer_tag_types:
+            gamer_tag_types[tournament.pk] = list(
+                get_gamer_tag_educated_guess(tournament)
+            )
+        return gamer_tag_types[tournament.pk]
+
     def get_gamer_id(self, obj):
+        gamer_tag_types = self._get_gamer_tag_types(obj.team.tournament)
         match = self.context.get("match_obj")
         if match:
             if (
                 match.match_start
                 and pytz.utc.localize(datetime.utcnow())
                 >= match.match_start - timedelta(minutes=30)
-                or obj.user.pk
-                in self.context["user_team"].team_members.values_list("user", flat=True)
+                or obj.user_id
+                in [
+                    member.user_id
+                    for member in self.context["user_team"].team_members.all()
+                ]
             ):
-                return {
-                    x: getattr(obj.user, x)
-                    for x in get_gamer_tag_educated_guess(obj.team.tournament)
-                }
-        return {x: "" for x in get_gamer_tag_educated_guess(obj.team.tournament)}
+                return {x: getattr(obj.user, x) for x in gamer_tag_types}
+        return {x: "" for x in gamer_tag_types}
 
 
 class InvitationSerializer(serializers.ModelSerializer):
@@ -226,40 +241,17 @@ class InvitationSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class TournamentGroupTeamSerializer(serializers.ModelSerializer):
+class GroupStandingSerializer(serializers.ModelSerializer):
 
-    school = serializers.CharField(source="school.name")
+    school = serializers.CharField(source="team.school.name")
+    name = serializers.CharField(source="team.name")
 
     class Meta:
-        model = TournamentTeam
-        fields = ("school", "name", "wins", "losses")
+        model = GroupStanding
+        fields = ("school", "name", "wins", "losses", "points")
         read_only_fields = fields
 
 
-class TournamentGroupSerializer(serializers.ModelSerializer):
-
-    teams = serializers.SerializerMethodField()
-    group_letter = serializers.SerializerMethodField()
-
-    class Meta:
-        model = TournamentGroup
-        fields = ("teams", "tournament", "group_letter")
-        read_only_fields = fields
-
-    def get_teams(self, obj):
-        return TournamentGroupTeamSerializer(
-            obj.teams.annotate(result=Sum(F("wins") - F("losses"))).order_by("-result"),
-            many=True,
-        ).data
-
-    def get_group_letter(self, obj):
-        try:
-            return self.context["groups_names"].pop(0)
-        except IndexError:
-            logger.error("Group names are too short!")
-            return "FallbackName"
-
-
 class TournamentMatchContestantsSerializer(serializers.ModelSerializer):
 
     team_members = TeamMemberSerializer(many=True)
@@ -281,13 +273,20 @@ class TournamentMatchContestantsSerializer(serializers.ModelSerializer):
 
 
 class TournamentMatchSerializer(serializers.ModelSerializer):
+    """
+    Reads relations through ``.all()`` only, so everything comes from the
+    prefetch plan of ``TournamentMatchViewSet.get_queryset``.
+    """
 
     contestants = TournamentMatchContestantsSerializer(many=True)
     tournament = serializers.CharField(source="tournament.name")
     winner = serializers.SerializerMethodField()
     tournament_img = serializers.SerializerMethodField()
+    tournament_img_renditions = serializers.SerializerMethodField()
     result_submitted = serializers.SerializerMethodField()
     match_logo = serializers.SerializerMethodField()
+    match_logo_renditions = serializers.SerializerMethodField()
+    contest_screenshot_renditions = serializers.SerializerMethodField()
     platforms = serializers.SerializerMethodField()
 
     class Meta:
@@ -298,6 +297,7 @@ class TournamentMatchSerializer(serializers.ModelSerializer):
             "tournament",
             "winner",
             "tournament_img",
+            "tournament_img_renditions",
             "result_submitted",
             "stage",
             "match_start",
@@ -305,24 +305,29 @@ class TournamentMatchSerializer(serializers.ModelSerializer):
             "is_contested",
             "is_final",
             "contest_screenshot",
+            "contest_screenshot_renditions",
             "round_number",
             "chat_channel",
             "place_finished",
             "match_logo",
+            "match_logo_renditions",
             "platforms",
         ]
         read_only_fields = fields
 
+    def _get_user_team(self, obj):
+        user = self.context["request"].user
+        for team in obj.contestants.all():
+            if any(member.user_id == user.pk for member in team.team_members.all()):
+                return team
+
     def get_winner(self, obj):
         if obj.is_contested:
             return "contested"
         elif obj.is_final:
             # return random.choice(["winner", "loser"])
-            return (
-                "winner"
-                if self.context["request"].user in obj.winner.team_members.all()
-                else "loser"
-            )
+            user_team = self._get_user_team(obj)
+            return "winner" if user_team and user_team.pk == obj.winner_id else "loser"
         else:
             return "pending"
 
@@ -331,17 +336,25 @@ class TournamentMatchSerializer(serializers.ModelSerializer):
         if img:
             return img.url
 
+    def get_tournament_img_renditions(self, obj):
+        return rendition_urls(obj.tournament.tournament_img_renditions)
+
     def get_result_submitted(self, obj):
-        user = self.context["request"].user
-        return obj.has_submitted_result(user)
+        return getattr(self._get_user_team(obj), "pk", None) in obj.result_submitted
 
     def get_match_logo(self, obj):
         logo = obj.tournament.match_logo
         if logo:
             return logo.url
 
+    def get_match_logo_renditions(self, obj):
+        return rendition_urls(obj.tournament.match_logo_renditions)
+
+    def get_contest_screenshot_renditions(self, obj):
+        return rendition_urls(obj.contest_screenshot_renditions)
+
     def get_platforms(self, obj):
-        return obj.tournament.platforms.values_list("name", flat=True)
+        return [platform.name for platform in obj.tournament.platforms.all()]
 
 
 class TournamentMatchListSerializer(serializers.ModelSerializer):
@@ -366,6 +379,10 @@ class TournamentMatchUpdateSerializer(serializers.Serializer):
     place_finished = serializers.IntegerField(required=False)
 
 
+class LobbyChatCursorSerializer(serializers.Serializer):
+    cursor = serializers.RegexField(r"^\d+-\d+$", required=False)
+
+
 class TournamentMatchContestSerializer(serializers.ModelSerializer):
 
     contest_screenshot = serializers.ImageField(required=True)
@@ -388,4 +405,4 @@ class MatchesPlayoffSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_contestants(self, obj):
-        return obj.contestants.values_list("name", flat=True)
+        return [team.name for team in obj.contestants.all()]
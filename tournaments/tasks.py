@@ -1,127 +1,103 @@
-import itertools
-import random
-
-from django.db.models import Count
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
 from django.utils import timezone
 
 from playpro.celery import app
+from tournaments.brackets import BracketLayout, qualify_from_groups
+from tournaments.lobbies import flush_lobby_messages
 from tournaments.models import (
     Tournament,
     TournamentTeam,
     TournamentMatch,
-    TournamentGroup,
 )
 
+STAGE_TRANSITION_KEY = "tournaments:stage-transition:{}"
+STAGE_TRANSITION_TIMEOUT = 60 * 5
+STAGE_TRANSITION_COUNTDOWN = 5
+
 
-def get_division_value(team_count):
-    if team_count >= 64:
-        return 8
-    elif team_count >= 32:
-        return 8
-    else:
-        return 4
+@app.task()
+def create_tournament_groups_or_ladder():
+    tournaments = Tournament.objects.annotate(
+        groups_count=Count("tournament_groups", distinct=True),
+        matches_count=Count("tournament_matches", distinct=True),
+    ).filter(
+        registration_close_date__gte=timezone.now(), groups_count=0, matches_count=0
+    )
+    for tournament in tournaments:
+        teams = TournamentTeam.objects.annotate(team_size=Count("team_members")).filter(
+            tournament=tournament, team_size=tournament.team_size
+        )
+        BracketLayout.build(tournament, teams).save()
 
 
-def build_chunks(chunk_size, data):
-    final_chunks = []
-    remainder = len(data) % chunk_size
-    if remainder:
-        equal_part = len(data) - remainder
-        chunks_count = int(equal_part / chunk_size + 1)
-        for _ in range(chunks_count):
-            final_chunks.append([])
-        for _ in range(chunks_count):
-            for chunk in final_chunks:
-                try:
-                    chunk.append(data.pop(0))
-                except IndexError:
-                    break
-    else:
-        final_chunks = [
-            data[x : x + chunk_size] for x in range(0, len(data), chunk_size)
-        ]
-    return final_chunks
+def schedule_stage_transition(tournament_id):
+    """
+    Enqueue a stage transition check for one tournament. Calls landing while
+    one is already queued are dropped, so a burst of results costs one task.
+    """
+    if cache.add(
+        STAGE_TRANSITION_KEY.format(tournament_id), True, STAGE_TRANSITION_TIMEOUT
+    ):
+        create_tournament_next_stage.apply_async(
+            (tournament_id,), countdown=STAGE_TRANSITION_COUNTDOWN
+        )
 
 
 @app.task()
-def create_tournament_groups_or_ladder():
-
-    for tournament in Tournament.objects.annotate(
-        groups_count=Count("tournament_groups")
-    ).filter(registration_close_date__gte=timezone.now(), groups_count=0):
-        team_size = tournament.team_size
-        qs = TournamentTeam.objects.annotate(team_size=Count("team_members")).filter(
-            tournament_id=tournament, team_size=team_size
+def create_tournament_next_stage(tournament_id):
+    # Playoff rounds advance match by match (tournaments.brackets.advance_playoff),
+    # this only seeds the bracket once the group stage is over.
+    cache.delete(STAGE_TRANSITION_KEY.format(tournament_id))
+    with transaction.atomic():
+        tournament = (
+            Tournament.objects.select_for_update().filter(pk=tournament_id).first()
         )
-        randomized_qs = list(qs)
-        random.shuffle(randomized_qs)
-        if qs.count() <= 16:
-            chunks = build_chunks(2, randomized_qs)
-            tournament.playoff_array = chunks
-            tournament.save()
-            for chunk in chunks:
-                obj = TournamentMatch.objects.create(
-                    tournament=tournament,
-                    stage=TournamentMatch.StageChoices.PLAYOFF,
-                    round_number=1,
-                )
-                for team in chunk:
-                    obj.add(team)
-                    obj.save()
-        else:
-            group_size = get_division_value(qs.count())
-            chunks = build_chunks(group_size, randomized_qs)
-            for chunk in chunks:
-                group = TournamentGroup.objects.create(tournament=tournament)
-                for item in chunk:
-                    group.teams.add(item)
-                team_pairs = list(itertools.combinations(chunk, 2))
-                for team_pair in team_pairs:
-                    obj = TournamentMatch.objects.create(
-                        tournament=tournament, stage=TournamentMatch.StageChoices.GROUP
-                    )
-                    for team in team_pair:
-                        obj.contestants.add(team)
+        if (
+            tournament is None
+            or tournament.tournament_matches.filter(
+                stage=TournamentMatch.StageChoices.PLAYOFF
+            ).exists()
+            or not tournament.tournament_groups.exists()
+            or tournament.tournament_matches.filter(
+                stage=TournamentMatch.StageChoices.GROUP, is_final=False
+            ).exists()
+        ):
+            return
+        layout = BracketLayout(tournament)
+        layout.add_playoff(qualify_from_groups(tournament))
+        layout.save()
 
 
 @app.task()
 def create_tournament_ladder_next_stages():
-    tournaments = Tournament.objects.annotate(
-        groups_count=Count("tournament_groups")
-    ).filter(groups_count__gt=0)
-    for tournament in tournaments:
-        playoffs_existing = tournament.tournament_matches.filter(
-            stage=TournamentMatch.StageChoices.PLAYOFF
-        ).count()
-        playoffs_finished = tournament.tournament_matches.filter(
-            stage=TournamentMatch.StageChoices.PLAYOFF, winner__isnull=False
-        ).count()
-        if playoffs_existing == playoffs_finished:
-            current_round_number = (
-                tournament.tournament_matches.filter(
-                    stage=TournamentMatch.StageChoices.PLAYOFF
-                )
-                .order_by("-round_number")
-                .first()
-                .round_number
-            )
-            if current_round_number < 4:
-                winners_ids = (
-                    tournament.tournament_matches.filter(
-                        stage=TournamentMatch.StageChoices.PLAYOFF,
-                        round_number=current_round_number,
-                    )
-                    .order_by("pk")
-                    .values_list("winner", flat=True)
+    # Safety net for transitions whose match_decided event got lost.
+    tournaments = (
+        Tournament.objects.annotate(
+            groups_count=Count("tournament_groups", distinct=True),
+            has_playoff=Exists(
+                TournamentMatch.objects.filter(
+                    tournament=OuterRef("pk"),
+                    stage=TournamentMatch.StageChoices.PLAYOFF,
                 )
-                winners = TournamentTeam.objects.filter(pk__in=winners_ids)
-                pairs = [winners[x : x + 2] for x in range(0, len(winners), 2)]
-                for pair in pairs:
-                    tm = TournamentMatch.objects.create(
-                        tournament=tournament,
-                        stage=TournamentMatch.StageChoices.PLAYOFF,
-                        round_number=current_round_number + 1,
-                    )
-                    for elem in pair:
-                        tm.contestants.add(elem)
-                    tm.save()
+            ),
+            pending_group_matches=Count(
+                "tournament_matches",
+                filter=Q(
+                    tournament_matches__stage=TournamentMatch.StageChoices.GROUP,
+                    tournament_matches__is_final=False,
+                ),
+                distinct=True,
+            ),
+        )
+        .filter(groups_count__gt=0, has_playoff=False, pending_group_matches=0)
+        .values_list("pk", flat=True)
+    )
+    for tournament_id in tournaments:
+        schedule_stage_transition(tournament_id)
+
+
+@app.task()
+def flush_lobby_chat():
+    return flush_lobby_messages()
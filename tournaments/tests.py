@@ -1,3 +1,410 @@
-from django.test import TestCase
+import math
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from tournaments.brackets import BracketLayout, advance_playoff
+from tournaments.cache import bump_tournament_version, tournament_versioned_response
+from tournaments.models import (
+    PlayoffRound,
+    Tournament,
+    TournamentMatch,
+    TournamentPlatform,
+    TournamentTeam,
+    TournamentTeamMember,
+)
+from users.models import School, User, UserAvatar
+
+
+def create_tournament(team_count, team_size=1):
+    now = timezone.now()
+    # bulk_create skips Tournament.save(), there is no logo to process.
+    (tournament,) = Tournament.objects.bulk_create(
+        [
+            Tournament(
+                name="Test tournament",
+                logo="logo.png",
+                registration_open_date=now - timedelta(days=7),
+                registration_close_date=now + timedelta(days=1),
+                registration_check_in_date=now,
+                team_size=team_size,
+            )
+        ]
+    )
+    school = School.objects.create(name="Test school")
+    users = User.objects.bulk_create(
+        [
+            User(
+                email=f"player{tournament.pk}-{index}@test.com",
+                school_email=f"player{tournament.pk}-{index}@school.com",
+                first_name="Player",
+                last_name=str(index),
+                nickname=f"player-{index}",
+                user_type=User.UserType.STUDENT,
+                dob=date(2006, 1, 1),
+                school=school,
+                graduation_year="2024",
+            )
+            for index in range(team_count * team_size)
+        ]
+    )
+    teams = TournamentTeam.objects.bulk_create(
+        [
+            TournamentTeam(
+                name=f"Team {index}",
+                school=school,
+                tournament=tournament,
+                captain=users[index * team_size],
+            )
+            for index in range(team_count)
+        ]
+    )
+    return tournament, teams, users
+
+
+class PlayoffLayoutTestCase(SimpleTestCase):
+    def layout(self, team_count):
+        layout = BracketLayout(Tournament())
+        layout.add_playoff(list(range(team_count)))
+        return layout
+
+    def test_first_round_is_padded_with_byes(self):
+        for team_count in range(2, 41):
+            with self.subTest(team_count=team_count):
+                layout = self.layout(team_count)
+                size = 2 ** math.ceil(math.log2(team_count))
+                first_round = [m for m in layout.matches if m.round_number == 1]
+                self.assertEqual(
+                    sorted(m.bracket_position for m in first_round),
+                    list(range(size // 2)),
+                )
+                self.assertEqual(
+                    sorted(team for m in first_round for team in m.teams),
+                    list(range(team_count)),
+                )
+                byes = [m for m in first_round if m.is_bye]
+                self.assertEqual(len(byes), size - team_count)
+                # The best seeds get the byes.
+                self.assertEqual(
+                    sorted(m.winner for m in byes), list(range(size - team_count))
+                )
+                self.assertEqual(
+                    [(r.round_number, r.matches_count) for r in layout.rounds],
+                    [
+                        (round_number, size // 2**round_number)
+                        for round_number in range(1, int(math.log2(size)) + 1)
+                    ],
+                )
+                self.assertEqual(layout.rounds[0].decided_count, len(byes))
+
+    def test_sibling_byes_meet_in_second_round(self):
+        for team_count in range(2, 41):
+            with self.subTest(team_count=team_count):
+                layout = self.layout(team_count)
+                byes = {
+                    m.bracket_position: m.winner
+                    for m in layout.matches
+                    if m.round_number == 1 and m.is_bye
+                }
+                expected = sorted(
+                    (position // 2, [byes[position], byes[position + 1]])
+                    for position in byes
+                    if position % 2 == 0 and position + 1 in byes
+                )
+                self.assertEqual(
+                    sorted(
+                        (m.bracket_position, m.teams)
+                        for m in layout.matches
+                        if m.round_number == 2
+                    ),
+                    expected,
+                )
+
+    def test_byes_avoid_each_other_while_possible(self):
+        for team_count in range(2, 41):
+            size = 2 ** math.ceil(math.log2(team_count))
+            if size - team_count > size // 4:
+                continue
+            with self.subTest(team_count=team_count):
+                layout = self.layout(team_count)
+                self.assertFalse([m for m in layout.matches if m.round_number == 2])
+
+
+class AdvancePlayoffTestCase(TestCase):
+    def seed(self, team_count):
+        tournament, teams, _ = create_tournament(team_count)
+        layout = BracketLayout(tournament)
+        layout.add_playoff(teams)
+        layout.save()
+        return tournament, teams
+
+    def decide(self, tournament, position, winner):
+        TournamentMatch.objects.filter(
+            tournament=tournament, round_number=1, bracket_position=position
+        ).update(winner=winner, is_final=True)
+        return advance_playoff(
+            TournamentMatch.objects.get(
+                tournament=tournament, round_number=1, bracket_position=position
+            )
+        )
+
+    def test_next_match_opens_once_both_siblings_are_decided(self):
+        tournament, teams = self.seed(4)
+        first_round = {
+            match.bracket_position: list(match.contestants.all())
+            for match in tournament.tournament_matches.filter(round_number=1)
+        }
+        self.assertIsNone(self.decide(tournament, 1, first_round[1][0]))
+        self.assertFalse(tournament.tournament_matches.filter(round_number=2).exists())
+        next_match = self.decide(tournament, 0, first_round[0][1])
+        self.assertEqual((next_match.round_number, next_match.bracket_position), (2, 0))
+        self.assertEqual(
+            set(next_match.contestants.all()), {first_round[0][1], first_round[1][0]}
+        )
+        self.assertEqual(
+            PlayoffRound.objects.get(
+                tournament=tournament, round_number=1
+            ).decided_count,
+            2,
+        )
+
+    def test_bye_advances_with_its_decided_sibling(self):
+        tournament, teams = self.seed(3)
+        # teams[0] is the best seed and holds the bye at position 0.
+        bye = tournament.tournament_matches.get(round_number=1, bracket_position=0)
+        self.assertEqual((bye.winner, bye.is_final), (teams[0], True))
+        next_match = self.decide(tournament, 1, teams[2])
+        self.assertEqual(set(next_match.contestants.all()), {teams[0], teams[2]})
+
+    def test_last_match_of_an_odd_round_advances_through_a_bye(self):
+        # Brackets paired by pk before bracket positions can have odd rounds.
+        tournament, teams, _ = create_tournament(6)
+        PlayoffRound.objects.bulk_create(
+            [
+                PlayoffRound(tournament=tournament, round_number=1, matches_count=3),
+                PlayoffRound(tournament=tournament, round_number=2, matches_count=2),
+                PlayoffRound(tournament=tournament, round_number=3, matches_count=1),
+            ]
+        )
+        for position in range(3):
+            match = TournamentMatch.objects.create(
+                tournament=tournament,
+                stage=TournamentMatch.StageChoices.PLAYOFF,
+                round_number=1,
+                bracket_position=position,
+            )
+            match.contestants.add(teams[2 * position], teams[2 * position + 1])
+        self.assertIsNone(self.decide(tournament, 2, teams[4]))
+        bye = tournament.tournament_matches.get(round_number=2, bracket_position=1)
+        self.assertEqual((bye.winner, bye.is_final), (teams[4], True))
+        self.assertEqual(list(bye.contestants.all()), [teams[4]])
+        self.assertEqual(
+            PlayoffRound.objects.get(
+                tournament=tournament, round_number=2
+            ).decided_count,
+            1,
+        )
+        self.decide(tournament, 0, teams[0])
+        semi_final = self.decide(tournament, 1, teams[2])
+        TournamentMatch.objects.filter(pk=semi_final.pk).update(
+            winner=teams[0], is_final=True
+        )
+        semi_final.refresh_from_db()
+        final = advance_playoff(semi_final)
+        self.assertEqual((final.round_number, final.bracket_position), (3, 0))
+        self.assertEqual(set(final.contestants.all()), {teams[0], teams[4]})
+
+    def test_final_does_not_advance(self):
+        tournament, teams = self.seed(2)
+        self.assertIsNone(self.decide(tournament, 0, teams[0]))
+        self.assertEqual(tournament.tournament_matches.count(), 1)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+)
+class AvailableTeammatesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        tournament, (self.team,), (self.user,) = create_tournament(1)
+        (avatar,) = UserAvatar.objects.bulk_create(
+            [UserAvatar(image="avatars/default.png")]
+        )
+        mates = User.objects.bulk_create(
+            [
+                User(
+                    email=f"mate{tournament.pk}-{nickname}@test.com",
+                    school_email=f"mate{tournament.pk}-{nickname}@school.com",
+                    first_name="Mate",
+                    last_name=nickname,
+                    nickname=nickname,
+                    user_type=User.UserType.STUDENT,
+                    dob=date(2006, 1, 1),
+                    school=self.user.school,
+                    graduation_year="2024",
+                    avatar=avatar,
+                )
+                for nickname in [f"ace-{index:02}" for index in range(11)] + ["zed"]
+            ]
+        )
+        User.objects.filter(pk=self.user.pk).update(avatar=avatar)
+        TournamentTeamMember.objects.create(
+            team=self.team, user=mates[0], invitation_accepted=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, **params):
+        response = self.client.get(
+            f"/tournaments/team/{self.team.pk}/available_teammates/", params
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_schoolmates_are_paginated_without_rostered_users(self):
+        data = self.get()
+        self.assertEqual(data["count"], 12)
+        self.assertEqual(len(data["results"]), 10)
+        self.assertIsNotNone(data["next"])
+        self.assertEqual(data["results"][0]["nickname"], "ace-01")
+        self.assertEqual(
+            [user["nickname"] for user in self.get(page=2)["results"]],
+            ["player-0", "zed"],
+        )
+
+    def test_search_matches_name_prefixes(self):
+        data = self.get(search="ACE")
+        self.assertEqual(data["count"], 10)
+        self.assertIsNone(data["next"])
+        self.assertEqual(self.get(search="ze")["count"], 1)
+        self.assertEqual(self.get(search="mate")["count"], 11)
+        self.assertEqual(self.get(search="ce")["count"], 0)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class MatchQueryBudgetTestCase(TestCase):
+    """Match detail and list cost the same queries whatever the team size."""
+
+    def seed(self, team_size, match_count=3):
+        tournament, teams, users = create_tournament(2, team_size)
+        tournament.platforms.add(TournamentPlatform.objects.create(name="PC"))
+        TournamentTeamMember.objects.bulk_create(
+            [
+                TournamentTeamMember(
+                    team=teams[index // team_size], user=user, invitation_accepted=True
+                )
+                for index, user in enumerate(users)
+            ]
+        )
+        matches = TournamentMatch.objects.bulk_create(
+            [
+                TournamentMatch(
+                    tournament=tournament,
+                    stage=TournamentMatch.StageChoices.GROUP,
+                    match_start=timezone.now() + timedelta(days=1),
+                )
+                for _ in range(match_count)
+            ]
+        )
+        TournamentMatch.contestants.through.objects.bulk_create(
+            [
+                TournamentMatch.contestants.through(
+                    tournamentmatch_id=match.pk, tournamentteam_id=team.pk
+                )
+                for match in matches
+                for team in teams
+            ]
+        )
+        client = APIClient()
+        client.force_authenticate(users[0])
+        return client, matches
+
+    def get(self, client, url):
+        # Warms the gamer tag types cache, which is shared by every request.
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_retrieve_query_count_ignores_team_size(self):
+        client, matches = self.seed(team_size=1)
+        budget = self.get(client, f"/tournaments/matches/{matches[0].pk}/")
+        client, matches = self.seed(team_size=5)
+        url = f"/tournaments/matches/{matches[0].pk}/"
+        client.get(url)
+        with self.assertNumQueries(budget):
+            response = client.get(url)
+        self.assertEqual(len(response.data["contestants"][0]["team_members"]), 5)
+
+    def test_list_query_count_ignores_team_size(self):
+        client, _ = self.seed(team_size=1)
+        budget = self.get(client, "/tournaments/matches/")
+        client, _ = self.seed(team_size=5)
+        client.get("/tournaments/matches/")
+        with self.assertNumQueries(budget):
+            response = client.get("/tournaments/matches/")
+        self.assertEqual(len(response.data), 3)
+
+
+class CountingView:
+    lookup_url_kwarg = None
+    lookup_field = "pk"
+
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = 0
+
+    @tournament_versioned_response
+    def groups(self, request, *args, **kwargs):
+        self.calls += 1
+        return Response({"tournament": kwargs["pk"]}, status=self.status)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class TournamentVersionedResponseTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, view, pk=1, **headers):
+        return view.groups(RequestFactory().get("/", **headers), pk=pk)
+
+    def test_matching_etag_gets_not_modified(self):
+        view = CountingView()
+        response = self.get(view)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'{"tournament":1}')
+        etag = response["ETag"]
+        response = self.get(view, HTTP_IF_NONE_MATCH=f'"other", {etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertTrue(response["Cache-Control"].startswith("private"))
+        self.assertEqual(view.calls, 1)
+
+    def test_body_is_cached_per_version(self):
+        view = CountingView()
+        etag = self.get(view)["ETag"]
+        self.assertEqual(self.get(view)["ETag"], etag)
+        self.assertEqual(view.calls, 1)
+        bump_tournament_version(1)
+        response = self.get(view, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(view.calls, 2)
+
+    def test_error_responses_are_not_cached(self):
+        view = CountingView(status=404)
+        self.assertEqual(self.get(view).status_code, 404)
+        self.assertEqual(self.get(view).status_code, 404)
+        self.assertEqual(view.calls, 2)
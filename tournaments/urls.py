@@ -9,6 +9,7 @@ from tournaments.views import (
     TournamentRankingsViewSet,
     ScheduleAPIView,
     TournamentStageAPIView,
+    GamerTagCacheStatsAPIView,
 )
 
 app_name = "tournaments"
@@ -37,6 +38,7 @@ tournament_rankings_viewset.register(
 
 urlpatterns = [
     path("schedule/", ScheduleAPIView.as_view()),
+    path("gamer_tag_cache_stats/", GamerTagCacheStatsAPIView.as_view()),
     path(
         "",
         include(
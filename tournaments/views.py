@@ -1,7 +1,10 @@
 import string
 from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
 
-from django.db.models import Exists, OuterRef
+from django.db.models import Prefetch, Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import mixins, status
@@ -9,19 +12,28 @@ from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, UpdateModelMixin
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet, GenericViewSet
 
 from notifications.receivers import notify_captain_invitation_denied
 from notifications.signals import invitation_revoked, invitation_created
+from tournaments.cache import (
+    gamer_tag_types_cache,
+    get_rostered_user_ids,
+    tournament_versioned_response,
+)
+from tournaments.lobbies import LOBBY_CHAT_PAGE_SIZE, get_lobby_messages
 from tournaments.models import (
+    GroupStanding,
     Tournament,
     TournamentTeam,
     TournamentTeamMember,
     TournamentMatch,
 )
 from tournaments.serializers import (
+    LobbyChatCursorSerializer,
     TournamentListSerializer,
     TournamentDetailSerializer,
     TeamCreateSerializer,
@@ -29,7 +41,7 @@ from tournaments.serializers import (
     TeamMemberUpdateSerializer,
     TeamMemberSerializer,
     InvitationSerializer,
-    TournamentGroupSerializer,
+    GroupStandingSerializer,
     TournamentMatchSerializer,
     TournamentMatchUpdateSerializer,
     TournamentMatchContestantsSerializer,
@@ -110,26 +122,42 @@ class TeamViewSet(
 
     @action(methods=("get",), detail=True)
     def available_teammates(self, request, *args, **kwargs):
-        try:
-            tournament = TournamentTeam.objects.get(pk=kwargs.get("pk")).tournament
-        except TournamentTeam.DoesNotExist:
+        tournament_id = (
+            TournamentTeam.objects.filter(pk=kwargs.get("pk"))
+            .values_list("tournament_id", flat=True)
+            .first()
+        )
+        if tournament_id is None:
             return Response(
                 {"errpr": "Team with given id does not exist!"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        return Response(
-            {
-                "users": UserTeammatesSrializer(
-                    User.objects.annotate(
-                        has_team=Exists(
-                            TournamentTeamMember.objects.filter(
-                                team__tournament=tournament, user=OuterRef("pk")
-                            )
-                        )
-                    ).filter(has_team=False, school_id=request.user.school_id),
-                    many=True,
-                ).data
-            }
+        queryset = (
+            User.objects.filter(school_id=request.user.school_id)
+            .exclude(
+                pk__in=get_rostered_user_ids(request.user.school_id, tournament_id)
+            )
+            .select_related("avatar")
+            .only(
+                "nickname",
+                "first_name",
+                "last_name",
+                "avatar__image",
+                "avatar__image_renditions",
+            )
+            .order_by("nickname", "pk")
+        )
+        search = request.query_params.get("search", "").strip()
+        if search:
+            queryset = queryset.filter(
+                Q(nickname__istartswith=search)
+                | Q(first_name__istartswith=search)
+                | Q(last_name__istartswith=search)
+            )
+        paginator = CustomPaginator()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(
+            UserTeammatesSrializer(page, many=True).data
         )
 
     @action(methods=("post", "get"), detail=True)
@@ -223,20 +251,51 @@ class TournamentMatchViewSet(
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         if self.action == "retrieve":
-            ctx["match_obj"] = self.get_object()
+            match = self.get_object()
+            ctx["match_obj"] = match
             ctx["user_team"] = [
                 x
-                for x in self.get_object().contestants.all()
-                if self.request.user.pk in x.team_members.values_list("user", flat=True)
+                for x in match.contestants.all()
+                if self.request.user.pk
+                in [member.user_id for member in x.team_members.all()]
             ][
                 0
             ]  # todo
         return ctx
 
+    def get_object(self):
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
     def get_queryset(self):
-        qs = TournamentMatch.objects.filter(
-            contestants__team_members__user=self.request.user
-        ).order_by("match_start")
+        if self.action == "chat":
+            return TournamentMatch.objects.filter(
+                contestants__team_members__user=self.request.user
+            )
+        qs = (
+            TournamentMatch.objects.filter(
+                contestants__team_members__user=self.request.user
+            )
+            .select_related("tournament")
+            .prefetch_related(
+                "tournament__platforms",
+                Prefetch(
+                    "contestants",
+                    queryset=TournamentTeam.objects.select_related(
+                        "tournament", "captain__school"
+                    ).prefetch_related(
+                        Prefetch(
+                            "team_members",
+                            queryset=TournamentTeamMember.objects.select_related(
+                                "user__avatar"
+                            ),
+                        )
+                    ),
+                ),
+            )
+            .order_by("match_start")
+        )
         if self.action == "list":
             return qs[:4]
         return qs
@@ -280,26 +339,37 @@ class TournamentMatchViewSet(
             status=status.HTTP_200_OK,
         )
 
+    @action(methods=("get",), detail=True)
+    def chat(self, request, *args, **kwargs):
+        serializer = LobbyChatCursorSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        messages = get_lobby_messages(
+            self.get_object(), before=serializer.validated_data.get("cursor")
+        )
+        return Response(
+            {
+                "messages": messages,
+                "cursor": messages[0]["id"]
+                if len(messages) == LOBBY_CHAT_PAGE_SIZE
+                else None,
+            }
+        )
+
 
 class TournamentRankingsViewSet(GenericViewSet, mixins.ListModelMixin):
 
-    queryset = (
-        Tournament.objects.all()
-        .prefetch_related(
-            "tournament_groups", "tournament_groups__teams__team_members__user"
-        )
-        .order_by("pk")
-    )
+    queryset = Tournament.objects.order_by("pk")
     serializer_class = TournamentListSerializer
+    lookup_value_regex = "[0-9]+"
 
-    def get_serializer_context(self):
-        ctx = super().get_serializer_context()
-        ctx["request"] = self.request
-        if self.action in ["groups", "playoff"]:
-            ctx["groups_names"] = self._get_groups_names(
-                count=self.get_object().tournament_groups.count()
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # The detail actions only need the tournament row.
+            queryset = queryset.prefetch_related(
+                "tournament_groups", "tournament_groups__teams__team_members__user"
             )
-        return ctx
+        return queryset
 
     def _get_groups_names(self, count):
         if count > 26:
@@ -311,21 +381,43 @@ class TournamentRankingsViewSet(GenericViewSet, mixins.ListModelMixin):
         return list(string.ascii_uppercase)[:count]
 
     @action(methods=("get",), detail=True)
+    @tournament_versioned_response
     def groups(self, request, *args, **kwargs):
+        if not Tournament.objects.filter(pk=kwargs["pk"]).exists():
+            raise Http404
+        standings = (
+            GroupStanding.objects.filter(tournament_id=kwargs["pk"])
+            .select_related("team__school")
+            .order_by("group_id", "-points", "-wins", "losses", "team_id")
+        )
+        groups = [
+            (group_id, list(group_standings))
+            for group_id, group_standings in groupby(
+                standings, key=attrgetter("group_id")
+            )
+        ]
         return Response(
-            TournamentGroupSerializer(
-                self.get_object().tournament_groups,
-                many=True,
-                context=self.get_serializer_context(),
-            ).data
+            [
+                {
+                    "teams": GroupStandingSerializer(group_standings, many=True).data,
+                    "tournament": int(kwargs["pk"]),
+                    "group_letter": group_letter,
+                }
+                for group_letter, (_, group_standings) in zip(
+                    self._get_groups_names(count=len(groups)), groups
+                )
+            ]
         )
 
     @action(methods=("get",), detail=True)
+    @tournament_versioned_response
     def playoff(self, request, *args, **kwargs):
         return Response(
             MatchesPlayoffSerializer(
                 self.get_object()
                 .tournament_matches.filter(stage=TournamentMatch.StageChoices.PLAYOFF)
+                .select_related("winner")
+                .prefetch_related("contestants")
                 .order_by("round_number", "pk"),
                 many=True,
                 context=self.get_serializer_context(),
@@ -364,3 +456,11 @@ class TournamentStageAPIView(APIView):
         else:
             tournament_status = "groups"
         return Response({"status": tournament_status})
+
+
+class GamerTagCacheStatsAPIView(APIView):
+    # Counters are per process, each worker reports its own.
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(gamer_tag_types_cache.stats())
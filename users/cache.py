@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from tournaments.models import TournamentTeamMember
+from users.models import User, UserAvatar
+
+USER_SNAPSHOT_KEY = "users:snapshot:v2:{}"
+USER_SNAPSHOT_TTL = 60 * 5
+DEFAULT_AVATAR_KEY = "users:default-avatar"
+DEFAULT_AVATAR_TTL = 60 * 60
+
+
+class UserSnapshot(
+    namedtuple("UserSnapshot", "pk nickname notifications_channel teams tournaments")
+):
+    """
+    Read-only view of a user for socket consumers. ``teams`` maps the ids
+    of the tournament teams the user is a member of to their names,
+    ``tournaments`` holds the ids of the tournaments of those teams.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def id(self):
+        return self.pk
+
+
+def build_user_snapshot(user_id):
+    user = (
+        User.objects.filter(pk=user_id, is_active=True)
+        .values("pk", "nickname", "notifications_channel")
+        .first()
+    )
+    if user is None:
+        return None
+    teams = {}
+    tournaments = set()
+    for team_id, team_name, tournament_id in TournamentTeamMember.objects.filter(
+        user_id=user_id
+    ).values_list("team_id", "team__name", "team__tournament_id"):
+        teams[team_id] = team_name
+        tournaments.add(tournament_id)
+    return UserSnapshot(teams=teams, tournaments=frozenset(tournaments), **user)
+
+
+def get_user_snapshot(user_id):
+    key = USER_SNAPSHOT_KEY.format(user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_user_snapshot(user_id)
+        if snapshot is not None:
+            cache.set(key, snapshot, USER_SNAPSHOT_TTL)
+    return snapshot
+
+
+def invalidate_user_snapshots(*user_ids):
+    cache.delete_many([USER_SNAPSHOT_KEY.format(user_id) for user_id in user_ids])
+
+
+def get_default_avatar_id():
+    return cache.get_or_set(
+        DEFAULT_AVATAR_KEY,
+        lambda: UserAvatar.objects.values_list("pk", flat=True).order_by("pk").first(),
+        DEFAULT_AVATAR_TTL,
+    )
+
+
+def invalidate_default_avatar():
+    cache.delete(DEFAULT_AVATAR_KEY)
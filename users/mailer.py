@@ -0,0 +1,146 @@
+from datetime import timedelta
+from functools import lru_cache
+
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.template.loader import get_template as load_template
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from users.models import OutboundEmail, User
+
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 60
+BATCH_SIZE = 100
+SEND_LEASE = timedelta(minutes=10)
+RETENTION = timedelta(days=30)
+PASSWORD_RESET_TEMPLATE = "users/acc_password_reset_mail.html"
+
+
+@lru_cache(maxsize=None)
+def get_template(name):
+    return load_template(name)
+
+
+def queue_email(to, subject, template, context):
+    """
+    Store an email to be sent by the outbox worker once the current
+    transaction commits. ``context`` has to be JSON serializable.
+    """
+    from users.tasks import send_outbound_emails
+
+    email = OutboundEmail.objects.create(
+        to=to, subject=subject, template=template, context=context
+    )
+    transaction.on_commit(send_outbound_emails.delay)
+    return email
+
+
+def password_reset_context(context):
+    """
+    Mint the reset link at send time, so a queued row never holds a live
+    token. Rows queued with a ready-made token are sent as they are.
+    """
+    if "user_id" not in context:
+        return context
+    user = User.objects.get(pk=context["user_id"])
+    return {
+        **context,
+        "user": {"first_name": user.first_name},
+        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+        "token": PasswordResetTokenGenerator().make_token(user),
+    }
+
+
+CONTEXT_BUILDERS = {PASSWORD_RESET_TEMPLATE: password_reset_context}
+
+
+def render_email(email, connection):
+    context = email.context
+    if email.template in CONTEXT_BUILDERS:
+        context = CONTEXT_BUILDERS[email.template](context)
+    message = EmailMessage(
+        email.subject,
+        get_template(email.template).render(context),
+        to=[email.to],
+        connection=connection,
+    )
+    message.content_subtype = "html"
+    return message
+
+
+def claim_pending_emails(batch_size):
+    """
+    Lease one batch of due emails: pushing ``next_attempt_at`` past the send
+    keeps other workers off them without holding row locks over the network.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                sent_at__isnull=True,
+                attempts__lt=MAX_ATTEMPTS,
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + SEND_LEASE
+        )
+    return emails
+
+
+def record_failure(email, now, exc):
+    email.attempts += 1
+    email.next_attempt_at = now + timedelta(
+        seconds=RETRY_BACKOFF * 2 ** (email.attempts - 1)
+    )
+    email.last_error = repr(exc)
+
+
+def send_pending_emails(batch_size=BATCH_SIZE):
+    """
+    Send one batch of due emails over a single connection. Failures,
+    including a connection that cannot be opened, are retried with
+    exponential backoff up to ``MAX_ATTEMPTS`` times. Returns the number of
+    emails processed.
+    """
+    emails = claim_pending_emails(batch_size)
+    if not emails:
+        return 0
+    now = timezone.now()
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        for email in emails:
+            record_failure(email, now, exc)
+    else:
+        try:
+            for email in emails:
+                try:
+                    render_email(email, connection).send()
+                except Exception as exc:
+                    record_failure(email, now, exc)
+                else:
+                    email.sent_at = timezone.now()
+                    email.context = {}
+        finally:
+            connection.close()
+    OutboundEmail.objects.bulk_update(
+        emails, ["attempts", "next_attempt_at", "sent_at", "last_error", "context"]
+    )
+    return len(emails)
+
+
+def purge_outbound_emails():
+    """Delete sent and abandoned emails older than ``RETENTION``."""
+    deleted, _ = OutboundEmail.objects.filter(
+        Q(sent_at__isnull=False) | Q(attempts__gte=MAX_ATTEMPTS),
+        created_at__lt=timezone.now() - RETENTION,
+    ).delete()
+    return deleted
@@ -0,0 +1,86 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from users.models import School, User
+
+SIGNUP_URL = "/users/create/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a burst of student signups against the registration endpoint "
+        "and reports queries per request and latency percentiles. "
+        "All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--signups", type=int, default=200)
+        parser.add_argument(
+            "--duplicates",
+            type=float,
+            default=0.1,
+            help="Share of requests re-using an already registered email.",
+        )
+        parser.add_argument(
+            "--real-hasher",
+            action="store_true",
+            help="Keep PASSWORD_HASHERS, by default a fast hasher isolates the "
+            "database path from the deliberately slow password hash.",
+        )
+
+    def _payloads(self, school, signups, duplicates):
+        every = round(1 / duplicates) if duplicates else 0
+        for index in range(signups):
+            number = index - 1 if every and index and index % every == 0 else index
+            yield {
+                "password": "Benchmark#Passw0rd",
+                "email": f"student{number}@onboarding.benchmark",
+                "first_name": "Student",
+                "last_name": str(number),
+                "user_type": User.UserType.STUDENT,
+                "dob": "2006-09-01",
+                "school": school.pk,
+                "school_email": f"student{number}@school.benchmark",
+                "tos_accepted": True,
+                "graduation_year": "2026",
+            }
+
+    def handle(self, *args, **options):
+        hashers = {}
+        if not options["real_hasher"]:
+            hashers["PASSWORD_HASHERS"] = [
+                "django.contrib.auth.hashers.MD5PasswordHasher"
+            ]
+        client = Client()
+        timings, query_counts, statuses = [], [], {}
+        with override_settings(ALLOWED_HOSTS=["*"], **hashers):
+            with transaction.atomic():
+                school = School.objects.create(name="Benchmark onboarding")
+                for payload in self._payloads(
+                    school, options["signups"], options["duplicates"]
+                ):
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        response = client.post(
+                            SIGNUP_URL, payload, content_type="application/json"
+                        )
+                        timings.append(time.perf_counter() - start)
+                    query_counts.append(len(queries.captured_queries))
+                    statuses[response.status_code] = (
+                        statuses.get(response.status_code, 0) + 1
+                    )
+                transaction.set_rollback(True)
+        quantiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f"{len(timings)} signups  "
+            f"statuses {dict(sorted(statuses.items()))}  "
+            f"{statistics.mean(query_counts):.1f} queries/request  "
+            f"p50 {quantiles[49] * 1000:.1f} ms  "
+            f"p95 {quantiles[94] * 1000:.1f} ms  "
+            f"total {sum(timings):.2f} s"
+        )
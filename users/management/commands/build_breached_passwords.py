@@ -0,0 +1,57 @@
+import hashlib
+import heapq
+import re
+
+from django.core.management.base import BaseCommand
+
+SHA1_LINE = re.compile(r"^([0-9A-Fa-f]{40})(?::\d+)?$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the sorted SHA-1 digest file read by the breached password "
+        "check of PasswordCharacterValidator. Input lines are either SHA-1 "
+        "hashes, optionally followed by ':count' as in the Pwned Passwords "
+        "downloads, or plain passwords."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output")
+        parser.add_argument("inputs", nargs="+")
+        parser.add_argument(
+            "--sorted",
+            action="store_true",
+            help="Inputs are hash lists already ordered by hash, they are "
+            "merged as a stream instead of being sorted in memory.",
+        )
+
+    def read_digests(self, path):
+        with open(path, encoding="utf-8", errors="surrogateescape") as fileobj:
+            for line in fileobj:
+                line = line.rstrip("\r\n")
+                if not line:
+                    continue
+                match = SHA1_LINE.match(line)
+                if match:
+                    yield bytes.fromhex(match.group(1))
+                else:
+                    yield hashlib.sha1(
+                        line.encode("utf-8", errors="surrogateescape")
+                    ).digest()
+
+    def handle(self, *args, **options):
+        streams = [self.read_digests(path) for path in options["inputs"]]
+        if options["sorted"]:
+            digests = heapq.merge(*streams)
+        else:
+            digests = sorted({digest for stream in streams for digest in stream})
+        written = 0
+        previous = None
+        with open(options["output"], "wb") as output:
+            for digest in digests:
+                if digest == previous:
+                    continue
+                output.write(digest)
+                previous = digest
+                written += 1
+        self.stdout.write(f"{written} digests written to {options['output']}")
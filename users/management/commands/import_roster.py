@@ -0,0 +1,66 @@
+import json
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from users.models import School
+from users.roster import (
+    ROSTER_CHUNK_SIZE,
+    ROSTER_FORMATS,
+    get_roster_format,
+    import_roster,
+    read_roster,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports the students of a school from a CSV or JSONL roster and "
+        "prints a per-line error report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--school", type=int, required=True)
+        parser.add_argument("--format", choices=ROSTER_FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=ROSTER_CHUNK_SIZE)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes, one per CPU by default.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and import, then roll everything back.",
+        )
+
+    def handle(self, *args, **options):
+        school = School.objects.filter(pk=options["school"]).first()
+        if school is None:
+            raise CommandError(f"School {options['school']} does not exist.")
+        roster_format = options["format"] or get_roster_format(options["path"])
+        if roster_format is None:
+            raise CommandError("Unable to tell the roster format, pass --format.")
+        start = time.perf_counter()
+        # Chunks commit as they go, unless the whole run is to be rolled back.
+        atomic = transaction.atomic() if options["dry_run"] else nullcontext()
+        with open(options["path"], "rb") as fileobj, atomic:
+            report = import_roster(
+                school,
+                read_roster(fileobj, roster_format),
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+            )
+            if options["dry_run"]:
+                transaction.set_rollback(True)
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        self.stdout.write(
+            f"{report.created} students created, {len(report.errors)} rows rejected "
+            f"in {time.perf_counter() - start:.1f} s"
+            + (" (dry run, rolled back)" if options["dry_run"] else "")
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_alter_user_notifications_channel"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="useravatar",
+            name="image_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.0.3 on 2026-10-18 14:50
+
+from django.db import migrations
+
+
+def clear_sent_email_context(apps, schema_editor):
+    # Sent password reset rows still carry a live uid/token pair.
+    OutboundEmail = apps.get_model("users", "OutboundEmail")
+    OutboundEmail.objects.filter(sent_at__isnull=False).update(context={})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0009_rosterimport"),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_sent_email_context, migrations.RunPython.noop),
+    ]
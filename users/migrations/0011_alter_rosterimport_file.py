@@ -0,0 +1,24 @@
+# Generated by Django 4.0.3 on 2026-10-18 15:10
+
+from django.db import migrations, models
+import playpro.storages
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_clear_sent_email_context"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="rosterimport",
+            name="file",
+            field=models.FileField(
+                blank=True,
+                storage=playpro.storages.private_storage,
+                upload_to=users.models.roster_upload_path,
+            ),
+        ),
+    ]
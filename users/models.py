@@ -3,19 +3,27 @@ from datetime import timedelta
 
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from shortuuid import ShortUUID
 
-from playpro.abstract import TimestampAbstractModel
+from playpro.abstract import ImageRenditionsMixin, TimestampAbstractModel
+from playpro.images import DEFAULT_RENDITIONS
+from playpro.storages import private_storage
 
 
 def avatar_upload_path(user, filename):
     return f"users/{user.id}/{uuid.uuid4()}"
 
 
+def roster_upload_path(roster_import, filename):
+    return f"rosters/{uuid.uuid4()}"
+
+
 def create_notification_channel():
     return ShortUUID(alphabet=settings.NOTIFICATION_CHARSET).random(length=10)
 
@@ -56,8 +64,11 @@ class UserManager(BaseUserManager):
         return self._create_user(email, password, **extra_fields)
 
 
-class UserAvatar(models.Model):
+class UserAvatar(ImageRenditionsMixin, models.Model):
+    RENDITIONS = {"image": DEFAULT_RENDITIONS}
+
     image = models.ImageField(upload_to="avatars/")
+    image_renditions = models.JSONField(default=dict, blank=True)
 
 
 class User(TimestampAbstractModel, AbstractBaseUser, PermissionsMixin):
@@ -107,6 +118,15 @@ class User(TimestampAbstractModel, AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = _("user")
         verbose_name_plural = _("users")
+        # Trigram indexes serve the case-insensitive prefix (LIKE) search of
+        # available teammates.
+        indexes = [
+            GinIndex(
+                OpClass(Upper(field), name="gin_trgm_ops"),
+                name=f"users_user_{field}_trgm",
+            )
+            for field in ("nickname", "first_name", "last_name")
+        ]
 
     @property
     def resend_activation_mail_available(self):
@@ -122,8 +142,10 @@ class User(TimestampAbstractModel, AbstractBaseUser, PermissionsMixin):
 
     def save(self, *args, **kwargs):
         if not self.pk:
+            from users.cache import get_default_avatar_id
+
             self.nickname = f"{self.first_name}-{self.last_name}"
-            self.avatar = UserAvatar.objects.first()
+            self.avatar_id = get_default_avatar_id()
         super().save(*args, **kwargs)
 
     def is_in_team(self, team):
@@ -136,3 +158,50 @@ class User(TimestampAbstractModel, AbstractBaseUser, PermissionsMixin):
 
 class School(models.Model):
     name = models.CharField(max_length=255)
+
+
+class OutboundEmail(TimestampAbstractModel, models.Model):
+    """Queued email, rendered and sent by users.tasks.send_outbound_emails."""
+
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    template = models.CharField(max_length=255)
+    context = models.JSONField(default=dict)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(sent_at__isnull=True),
+                name="users_outboundemail_pending",
+            ),
+        ]
+
+
+class RosterImport(TimestampAbstractModel, models.Model):
+    """School roster upload, imported by users.tasks.import_roster_upload."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    school = models.ForeignKey(School, on_delete=models.CASCADE)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    # Holds plain text passwords: private storage, random name, deleted as
+    # soon as the import has run.
+    file = models.FileField(
+        storage=private_storage, upload_to=roster_upload_path, blank=True
+    )
+    format = models.CharField(max_length=10)
+    status = models.CharField(
+        choices=Status.choices, default=Status.PENDING, max_length=10
+    )
+    created_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list)
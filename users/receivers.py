@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tournaments.models import TournamentTeam, TournamentTeamMember
+from users.cache import invalidate_default_avatar, invalidate_user_snapshots
+from users.models import User, UserAvatar
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_snapshot_handler(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user_snapshots(user_id))
+
+
+@receiver(post_save, sender=TournamentTeamMember)
+@receiver(post_delete, sender=TournamentTeamMember)
+def team_member_snapshot_handler(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_snapshots(user_id))
+
+
+@receiver(post_save, sender=TournamentTeam)
+def team_snapshot_handler(sender, instance, created, **kwargs):
+    if created:
+        return
+    user_ids = list(instance.team_members.values_list("user_id", flat=True))
+    transaction.on_commit(lambda: invalidate_user_snapshots(*user_ids))
+
+
+@receiver(post_save, sender=UserAvatar)
+@receiver(post_delete, sender=UserAvatar)
+def default_avatar_handler(sender, created=False, **kwargs):
+    if created or kwargs["signal"] is post_delete:
+        transaction.on_commit(invalidate_default_avatar)
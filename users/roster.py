@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext as _
+
+from users.cache import get_default_avatar_id
+from users.models import User
+
+ROSTER_FORMATS = ("csv", "jsonl")
+ROSTER_CHUNK_SIZE = 500
+
+RosterRow = namedtuple("RosterRow", "line data")
+RosterReport = namedtuple("RosterReport", "created errors")
+
+
+def get_roster_format(filename):
+    extension = filename.rpartition(".")[2].lower()
+    return extension if extension in ROSTER_FORMATS else None
+
+
+def read_roster(fileobj, roster_format):
+    """
+    Stream ``RosterRow``s out of a binary CSV (with a header row) or JSONL
+    file. Lines that are not a JSON object come out with ``data=None``.
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if roster_format == "csv":
+        reader = csv.DictReader(text)
+        for data in reader:
+            yield RosterRow(reader.line_num, data)
+        return
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            data = None
+        yield RosterRow(line, data if isinstance(data, dict) else None)
+
+
+def hash_passwords(passwords, executor=None):
+    if executor is None or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    return list(executor.map(make_password, passwords))
+
+
+def build_student(school, avatar_id, data, password):
+    nickname = f"{data['first_name']}-{data['last_name']}"
+    return User(
+        **{key: value for key, value in data.items() if key != "password"},
+        password=password,
+        school=school,
+        user_type=User.UserType.STUDENT,
+        nickname=nickname[: User._meta.get_field("nickname").max_length],
+        avatar_id=avatar_id,
+    )
+
+
+def row_error(line, errors):
+    return {"line": line, "errors": errors}
+
+
+def create_students(school, rows, errors, executor=None):
+    """
+    Create one chunk of validated ``(line, data)`` rows, skipping emails
+    that are already registered. Returns the number of users created.
+    """
+    existing = set(
+        User.objects.filter(
+            email__in=[data["email"] for line, data in rows]
+        ).values_list("email", flat=True)
+    )
+    taken = {"email": [_("User with such email already exists.")]}
+    errors += [
+        row_error(line, taken) for line, data in rows if data["email"] in existing
+    ]
+    rows = [(line, data) for line, data in rows if data["email"] not in existing]
+    passwords = hash_passwords([data["password"] for line, data in rows], executor)
+    avatar_id = get_default_avatar_id()
+    users = [
+        build_student(school, avatar_id, data, password)
+        for (line, data), password in zip(rows, passwords)
+    ]
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+        return len(users)
+    except IntegrityError:
+        pass
+    # Someone registered one of the emails meanwhile, retry row by row.
+    created = 0
+    for (line, data), user in zip(rows, users):
+        try:
+            with transaction.atomic():
+                user.save()
+            created += 1
+        except IntegrityError:
+            errors.append(row_error(line, taken))
+    return created
+
+
+def import_roster(school, rows, chunk_size=ROSTER_CHUNK_SIZE, workers=None):
+    """
+    Import students of ``school`` from ``RosterRow``s.
+
+    Rows are validated as they stream in and written in chunks of
+    ``chunk_size`` with one existence query and one bulk insert each, the
+    passwords being hashed in a pool of ``workers`` processes
+    (``workers=1`` hashes in process). Invalid rows, emails repeated in
+    the roster and already registered ones are reported per line, the rest
+    is imported.
+    """
+    from users.serializers import RosterRowSerializer
+
+    created = 0
+    errors = []
+    seen = set()
+    pending = []
+    executor = ProcessPoolExecutor(workers) if workers != 1 else None
+    try:
+        for row in rows:
+            if row.data is None:
+                errors.append(
+                    row_error(row.line, {"non_field_errors": [_("Invalid row.")]})
+                )
+                continue
+            serializer = RosterRowSerializer(data=row.data)
+            if not serializer.is_valid():
+                errors.append(row_error(row.line, serializer.errors))
+                continue
+            data = serializer.validated_data
+            if data["email"] in seen:
+                errors.append(
+                    row_error(row.line, {"email": [_("Duplicate email in roster.")]})
+                )
+                continue
+            seen.add(data["email"])
+            pending.append((row.line, data))
+            if len(pending) >= chunk_size:
+                created += create_students(school, pending, errors, executor)
+                pending = []
+        if pending:
+            created += create_students(school, pending, errors, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    errors.sort(key=lambda error: error["line"])
+    return RosterReport(created, errors)
@@ -1,10 +1,13 @@
 from django.contrib.auth.password_validation import (
     get_default_password_validators,
+    validate_password,
 )
 from django.core.exceptions import ValidationError
 from rest_framework import serializers
 
-from users.models import User, School, UserAvatar
+from playpro.images import rendition_urls
+from users.models import User, RosterImport, School, UserAvatar
+from users.roster import ROSTER_FORMATS, get_roster_format
 from django.utils.translation import gettext_lazy as _
 
 
@@ -25,13 +28,13 @@ class UserCreateSerializer(serializers.ModelSerializer):
             "tos_accepted",
             "graduation_year",
         )
+        # Uniqueness is left to the database, see UserCreateAPIView.
+        extra_kwargs = {"email": {"validators": []}}
 
     def validate(self, attrs):
         errors = []
         if not attrs.get("tos_accepted"):
             errors.append({"tos_accepted": _("You need to accept terms of service.")})
-        if User.objects.filter(email=attrs.get("email")).exists():
-            errors.append({"email": _("Email already in use!")})
         if attrs.get("user_type") == User.UserType.STUDENT:
             if not attrs.get("graduation_year"):
                 errors.append(
@@ -50,6 +53,59 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class RosterRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = (
+            "password",
+            "email",
+            "first_name",
+            "last_name",
+            "dob",
+            "school_email",
+            "graduation_year",
+        )
+        extra_kwargs = {"email": {"validators": []}}
+
+    def validate_password(self, value):
+        try:
+            validate_password(value)
+        except ValidationError as error:
+            raise serializers.ValidationError(error.messages)
+        return value
+
+
+class RosterImportSerializer(serializers.Serializer):
+
+    school = serializers.PrimaryKeyRelatedField(queryset=School.objects.all())
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=ROSTER_FORMATS, required=False)
+
+    def validate(self, attrs):
+        if "format" not in attrs:
+            attrs["format"] = get_roster_format(attrs["file"].name)
+            if attrs["format"] is None:
+                raise serializers.ValidationError(
+                    {"format": _("Unable to tell the roster format from the file.")}
+                )
+        return attrs
+
+
+class RosterImportReportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RosterImport
+        fields = (
+            "id",
+            "school",
+            "status",
+            "created_count",
+            "errors",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
 class EmailResetSerializer(serializers.Serializer):
 
     email = serializers.EmailField(required=True)
@@ -79,11 +135,13 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
 class ProfileSerializer(serializers.ModelSerializer):
 
     avatar = serializers.SerializerMethodField()
+    avatar_renditions = serializers.SerializerMethodField()
     school_name = serializers.CharField(source="school.name")
 
     class Meta:
         fields = (
             "avatar",
+            "avatar_renditions",
             "email",
             "first_name",
             "last_name",
@@ -108,6 +166,9 @@ class ProfileSerializer(serializers.ModelSerializer):
         except AttributeError:
             return
 
+    def get_avatar_renditions(self, obj):
+        return rendition_urls(obj.avatar.image_renditions) if obj.avatar else {}
+
 
 class ProfilePasswordUpdateSerializer(serializers.Serializer):
 
@@ -123,10 +184,21 @@ class ProfilePasswordUpdateSerializer(serializers.Serializer):
 class UserTeammatesSrializer(serializers.ModelSerializer):
 
     avatar = serializers.URLField(source="avatar.image.url")
+    avatar_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ("id", "avatar", "nickname", "first_name", "last_name")
+        fields = (
+            "id",
+            "avatar",
+            "avatar_renditions",
+            "nickname",
+            "first_name",
+            "last_name",
+        )
+
+    def get_avatar_renditions(self, obj):
+        return rendition_urls(obj.avatar.image_renditions) if obj.avatar else {}
 
 
 class SchoolSerializer(serializers.ModelSerializer):
@@ -136,6 +208,12 @@ class SchoolSerializer(serializers.ModelSerializer):
 
 
 class AvatarSerializer(serializers.ModelSerializer):
+
+    renditions = serializers.SerializerMethodField()
+
     class Meta:
-        fields = ("image", "id")
+        fields = ("image", "id", "renditions")
         model = UserAvatar
+
+    def get_renditions(self, obj):
+        return rendition_urls(obj.image_renditions)
@@ -0,0 +1,44 @@
+from playpro.celery import app
+from users.mailer import BATCH_SIZE, purge_outbound_emails, send_pending_emails
+from users.models import RosterImport
+from users.roster import import_roster, read_roster
+
+
+@app.task()
+def send_outbound_emails():
+    while send_pending_emails() == BATCH_SIZE:
+        pass
+
+
+@app.task()
+def purge_sent_emails():
+    return purge_outbound_emails()
+
+
+@app.task()
+def import_roster_upload(roster_import_id):
+    roster_import = (
+        RosterImport.objects.select_related("school")
+        .filter(pk=roster_import_id, status=RosterImport.Status.PENDING)
+        .first()
+    )
+    if roster_import is None:
+        return
+    try:
+        with roster_import.file.open("rb") as fileobj:
+            # Celery workers are daemonic and cannot fork a process pool.
+            report = import_roster(
+                roster_import.school,
+                read_roster(fileobj, roster_import.format),
+                workers=1,
+            )
+    except Exception:
+        roster_import.status = RosterImport.Status.FAILED
+        raise
+    else:
+        roster_import.status = RosterImport.Status.DONE
+        roster_import.created_count = report.created
+        roster_import.errors = report.errors
+    finally:
+        roster_import.file.delete(save=False)
+        roster_import.save()
@@ -1,3 +1,257 @@
-from django.test import TestCase
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.mailer import (
+    MAX_ATTEMPTS,
+    PASSWORD_RESET_TEMPLATE,
+    RETENTION,
+    RETRY_BACKOFF,
+    purge_outbound_emails,
+    send_pending_emails,
+)
+from users.models import OutboundEmail, RosterImport, School, User
+from users.tasks import import_roster_upload
+from users.validators import PasswordCharacterValidator
+
+
+def queue_reset_email(**kwargs):
+    # A legacy context with a ready-made link, rendered as it is.
+    return OutboundEmail.objects.create(
+        to="player@test.com",
+        subject="Reset your password",
+        template=PASSWORD_RESET_TEMPLATE,
+        context={"user": {"first_name": "Player"}, "uid": "MQ", "token": "token"},
+        **kwargs,
+    )
+
+
+class SendPendingEmailsTestCase(TestCase):
+    def test_sent_email_drops_its_context(self):
+        email = queue_reset_email()
+        self.assertEqual(send_pending_emails(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("/pasword-reset/MQ/token", mail.outbox[0].body)
+        email.refresh_from_db()
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(email.context, {})
+
+    def test_unreachable_server_backs_off_the_whole_batch(self):
+        emails = [queue_reset_email(), queue_reset_email()]
+        started = timezone.now()
+        with mock.patch("users.mailer.get_connection") as get_connection:
+            get_connection.return_value.open.side_effect = ConnectionRefusedError
+            self.assertEqual(send_pending_emails(), 2)
+        for email in emails:
+            email.refresh_from_db()
+            self.assertIsNone(email.sent_at)
+            self.assertEqual(email.attempts, 1)
+            self.assertIn("ConnectionRefusedError", email.last_error)
+            self.assertGreaterEqual(
+                email.next_attempt_at, started + timedelta(seconds=RETRY_BACKOFF)
+            )
+        # Nothing is due again until the backoff has passed.
+        self.assertEqual(send_pending_emails(), 0)
+
+    def test_failed_email_backs_off_exponentially(self):
+        email = queue_reset_email(attempts=2)
+        started = timezone.now()
+        with mock.patch("users.mailer.get_connection") as get_connection:
+            get_connection.return_value.send_messages.side_effect = SMTPException
+            self.assertEqual(send_pending_emails(), 1)
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 3)
+        self.assertGreaterEqual(
+            email.next_attempt_at, started + timedelta(seconds=RETRY_BACKOFF * 4)
+        )
+        self.assertEqual(email.context["token"], "token")
+
+    def test_email_out_of_attempts_is_not_sent(self):
+        queue_reset_email(attempts=MAX_ATTEMPTS)
+        self.assertEqual(send_pending_emails(), 0)
+        self.assertEqual(mail.outbox, [])
+
+
+class PurgeOutboundEmailsTestCase(TestCase):
+    def test_old_sent_and_abandoned_emails_are_deleted(self):
+        now = timezone.now()
+        old_sent = queue_reset_email(sent_at=now)
+        old_abandoned = queue_reset_email(attempts=MAX_ATTEMPTS)
+        old_pending = queue_reset_email(attempts=1)
+        recent_sent = queue_reset_email(sent_at=now)
+        OutboundEmail.objects.filter(
+            pk__in=[old_sent.pk, old_abandoned.pk, old_pending.pk]
+        ).update(created_at=now - RETENTION - timedelta(days=1))
+        self.assertEqual(purge_outbound_emails(), 2)
+        self.assertEqual(
+            set(OutboundEmail.objects.values_list("pk", flat=True)),
+            {old_pending.pk, recent_sent.pk},
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ImportRosterUploadTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(directory.name)
+        patcher = mock.patch.object(
+            RosterImport._meta.get_field("file"), "storage", self.storage
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_import(self, content):
+        roster_import = RosterImport(
+            school=School.objects.create(name="Test school"), format="jsonl"
+        )
+        roster_import.file.save("students.jsonl", ContentFile(content))
+        return roster_import
+
+    def test_file_is_stored_under_a_random_name(self):
+        roster_import = self.create_import(b"not json\n")
+        self.assertNotIn("students", roster_import.file.name)
+        self.assertTrue(roster_import.file.name.startswith("rosters/"))
+
+    def test_file_is_deleted_after_the_import(self):
+        roster_import = self.create_import(b"not json\n")
+        name = roster_import.file.name
+        import_roster_upload(roster_import.pk)
+        roster_import.refresh_from_db()
+        self.assertFalse(self.storage.exists(name))
+        self.assertEqual(roster_import.file.name, "")
+        self.assertEqual(roster_import.status, RosterImport.Status.DONE)
+        self.assertEqual(
+            roster_import.errors,
+            [{"line": 1, "errors": {"non_field_errors": ["Invalid row."]}}],
+        )
+
+    def test_file_is_deleted_when_the_import_fails(self):
+        roster_import = self.create_import(b"not json\n")
+        name = roster_import.file.name
+        with mock.patch("users.tasks.import_roster", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                import_roster_upload(roster_import.pk)
+        roster_import.refresh_from_db()
+        self.assertFalse(self.storage.exists(name))
+        self.assertEqual(roster_import.status, RosterImport.Status.FAILED)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class UserCreateTestCase(TestCase):
+    def signup(self, school):
+        return APIClient().post(
+            "/users/create/",
+            {
+                "password": "Pl4yPro!Season",
+                "email": "player@test.com",
+                "first_name": "Player",
+                "last_name": "One",
+                "user_type": User.UserType.STUDENT,
+                "dob": "2006-01-01",
+                "school": school.pk,
+                "school_email": "player@school.com",
+                "tos_accepted": True,
+                "graduation_year": "2024",
+            },
+            format="json",
+        )
+
+    def test_duplicate_email_is_rejected_by_the_database(self):
+        school = School.objects.create(name="Test school")
+        response = self.signup(school)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("token", response.data)
+        response = self.signup(school)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data, {"errors": "User with such email already exists."}
+        )
+        self.assertEqual(User.objects.filter(email="player@test.com").count(), 1)
+
+
+class PasswordCharacterValidatorTestCase(SimpleTestCase):
+    def test_characters_are_counted_per_class(self):
+        validator = PasswordCharacterValidator()
+        # digits, alphas, uppers, lowers, specials
+        for password, counts in (
+            ("", (0, 0, 0, 0, 0)),
+            ("Abc1!", (1, 3, 1, 2, 1)),
+            ("AB12cd#$", (2, 4, 2, 2, 2)),
+            ("pass word,-", (0, 8, 0, 8, 0)),
+        ):
+            with self.subTest(password=password):
+                self.assertEqual(validator.count_characters(password), counts)
+
+    def test_error_codes_are_unchanged(self):
+        validator = PasswordCharacterValidator()
+        with self.assertRaises(ValidationError) as context:
+            validator.validate("password")
+        self.assertEqual(
+            [error.code for error in context.exception.error_list],
+            [
+                "min_length_digit",
+                "min_length_upper_characters",
+                "min_length_special_characters",
+            ],
+        )
+        validator.validate("Pa55word!")
+
+    def test_non_ascii_and_custom_specials_are_classified(self):
+        validator = PasswordCharacterValidator(special_characters="-")
+        # ٣ is an Arabic-Indic digit, É and ß are letters, € is no class.
+        self.assertEqual(validator.count_characters("Éß٣€-!a"), (1, 3, 1, 2, 1))
+
+    def build_breached_file(self, lines, *options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source = os.path.join(directory.name, "source.txt")
+        output = os.path.join(directory.name, "breached.bin")
+        with open(source, "w") as fileobj:
+            fileobj.write("\n".join(lines) + "\n")
+        call_command(
+            "build_breached_passwords", output, source, *options, stdout=StringIO()
+        )
+        return output
+
+    def test_breached_password_is_rejected(self):
+        breached = "Pa55word!"
+        output = self.build_breached_file(
+            [
+                "Summer2024!",
+                hashlib.sha1(breached.encode()).hexdigest().upper() + ":42",
+                "Summer2024!",
+            ]
+        )
+        with open(output, "rb") as fileobj:
+            digests = fileobj.read()
+        self.assertEqual(len(digests), 2 * hashlib.sha1().digest_size)
+        validator = PasswordCharacterValidator(breached_passwords_file=output)
+        with self.assertRaises(ValidationError) as context:
+            validator.validate(breached)
+        self.assertEqual(
+            [error.code for error in context.exception.error_list],
+            ["password_breached"],
+        )
+        validator.validate("Pa55word!?")
+
+    def test_empty_breached_file_rejects_nothing(self):
+        output = self.build_breached_file([], "--sorted")
+        PasswordCharacterValidator(breached_passwords_file=output).validate("Pa55word!")
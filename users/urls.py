@@ -4,6 +4,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from users.views import (
     EmailUniquenessAPIView,
     UserCreateAPIView,
+    RosterImportAPIView,
+    RosterImportReportAPIView,
     SchoolListAPIView,
     UserPasswordResetLinkGenerateAPIView,
     UserPasswordResetAPIView,
@@ -18,6 +20,8 @@ urlpatterns = [
     path("email-uniqueness/<str:email>/", EmailUniquenessAPIView.as_view()),
     path("schools/", SchoolListAPIView.as_view()),
     path("create/", UserCreateAPIView.as_view()),
+    path("roster-import/", RosterImportAPIView.as_view()),
+    path("roster-import/<int:pk>/", RosterImportReportAPIView.as_view()),
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("password-reset/", UserPasswordResetLinkGenerateAPIView.as_view()),
@@ -1,3 +1,9 @@
+import bisect
+import hashlib
+import mmap
+import string
+from functools import cached_property
+
 from django.core.exceptions import ValidationError
 
 try:
@@ -5,6 +11,35 @@ try:
 except ImportError:
     from django.utils.translation import ugettext as _, ungettext as ngettext
 
+DIGIT, UPPER, LOWER, SPECIAL, OTHER = "dulso"
+
+
+class SortedDigestFile:
+    """
+    File of sorted, fixed width SHA-1 digests, memory-mapped and searched
+    with bisect, so a lookup reads a few pages instead of the whole file.
+    """
+
+    record_size = hashlib.sha1().digest_size
+
+    def __init__(self, path):
+        with open(path, "rb") as fileobj:
+            size = fileobj.seek(0, 2)
+            self.data = (
+                mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            )
+
+    def __len__(self):
+        return len(self.data) // self.record_size
+
+    def __getitem__(self, index):
+        start = index * self.record_size
+        return self.data[start : start + self.record_size]
+
+    def __contains__(self, digest):
+        index = bisect.bisect_left(self, digest)
+        return index < len(self) and self[index] == digest
+
 
 class PasswordCharacterValidator:
     def __init__(
@@ -15,6 +50,7 @@ class PasswordCharacterValidator:
         min_length_lower=1,
         min_length_upper=1,
         special_characters="~!@#$%^&*()_+{}\".:;'[]",
+        breached_passwords_file=None,
     ):
         self.min_length_digit = min_length_digit
         self.min_length_alpha = min_length_alpha
@@ -22,10 +58,53 @@ class PasswordCharacterValidator:
         self.min_length_lower = min_length_lower
         self.min_length_upper = min_length_upper
         self.special_characters = special_characters
+        self.breached_passwords_file = breached_passwords_file
+        # ASCII characters and specials map to their class, anything else is
+        # left as is and classified one by one.
+        self.character_classes = str.maketrans(
+            {
+                **{chr(code): OTHER for code in range(128)},
+                **dict.fromkeys(string.digits, DIGIT),
+                **dict.fromkeys(string.ascii_uppercase, UPPER),
+                **dict.fromkeys(string.ascii_lowercase, LOWER),
+                **dict.fromkeys(special_characters, SPECIAL),
+            }
+        )
+
+    @cached_property
+    def breached_digests(self):
+        return SortedDigestFile(self.breached_passwords_file)
+
+    def count_characters(self, password):
+        classes = password.translate(self.character_classes)
+        digits, uppers, lowers, specials = (
+            classes.count(character_class)
+            for character_class in (DIGIT, UPPER, LOWER, SPECIAL)
+        )
+        alphas = uppers + lowers
+        if not classes.isascii():
+            for char in classes:
+                if char.isascii():
+                    continue
+                if char.isdigit():
+                    digits += 1
+                elif char.isalpha():
+                    alphas += 1
+                    if char.isupper():
+                        uppers += 1
+                    elif char.islower():
+                        lowers += 1
+        return digits, alphas, uppers, lowers, specials
+
+    def is_breached(self, password):
+        if not self.breached_passwords_file:
+            return False
+        return hashlib.sha1(password.encode()).digest() in self.breached_digests
 
     def validate(self, password, user=None):
         validation_errors = []
-        if len([char for char in password if char.isdigit()]) < self.min_length_digit:
+        digits, alphas, uppers, lowers, specials = self.count_characters(password)
+        if digits < self.min_length_digit:
             validation_errors.append(
                 ValidationError(
                     ngettext(
@@ -37,7 +116,7 @@ class PasswordCharacterValidator:
                     code="min_length_digit",
                 )
             )
-        if len([char for char in password if char.isalpha()]) < self.min_length_alpha:
+        if alphas < self.min_length_alpha:
             validation_errors.append(
                 ValidationError(
                     ngettext(
@@ -49,7 +128,7 @@ class PasswordCharacterValidator:
                     code="min_length_alpha",
                 )
             )
-        if len([char for char in password if char.isupper()]) < self.min_length_upper:
+        if uppers < self.min_length_upper:
             validation_errors.append(
                 ValidationError(
                     ngettext(
@@ -61,7 +140,7 @@ class PasswordCharacterValidator:
                     code="min_length_upper_characters",
                 )
             )
-        if len([char for char in password if char.islower()]) < self.min_length_lower:
+        if lowers < self.min_length_lower:
             validation_errors.append(
                 ValidationError(
                     ngettext(
@@ -73,10 +152,7 @@ class PasswordCharacterValidator:
                     code="min_length_lower_characters",
                 )
             )
-        if (
-            len([char for char in password if char in self.special_characters])
-            < self.min_length_special
-        ):
+        if specials < self.min_length_special:
             validation_errors.append(
                 ValidationError(
                     ngettext(
@@ -88,6 +164,13 @@ class PasswordCharacterValidator:
                     code="min_length_special_characters",
                 )
             )
+        if self.is_breached(password):
+            validation_errors.append(
+                ValidationError(
+                    _("This password has appeared in a data breach."),
+                    code="password_breached",
+                )
+            )
         if validation_errors:
             raise ValidationError(validation_errors)
 
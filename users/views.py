@@ -4,20 +4,24 @@ import pytz
 from coreapi.compat import force_text
 from django.contrib.auth import get_user
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.db import IntegrityError, transaction
+from django.utils.http import urlsafe_base64_decode
 from django.utils.translation import gettext as _
 from django.conf import settings
 from rest_framework import status
-from rest_framework.generics import RetrieveUpdateAPIView, ListAPIView
+from rest_framework.generics import (
+    ListAPIView,
+    RetrieveAPIView,
+    RetrieveUpdateAPIView,
+)
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from tournaments.models import TournamentTeam
 from tournaments.serializers import TournamentMatchContestantsSerializer
-from users.models import User, School, UserAvatar
+from users.mailer import PASSWORD_RESET_TEMPLATE, queue_email
+from users.models import User, RosterImport, School, UserAvatar
 from users.serializers import (
     UserCreateSerializer,
     EmailResetSerializer,
@@ -27,7 +31,10 @@ from users.serializers import (
     ProfilePasswordUpdateSerializer,
     SchoolSerializer,
     AvatarSerializer,
+    RosterImportSerializer,
+    RosterImportReportSerializer,
 )
+from users.tasks import import_roster_upload
 
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -58,26 +65,49 @@ class UserCreateAPIView(APIView):
         serializer = UserCreateSerializer(data=request.data)
         if serializer.is_valid():
             data = serializer.validated_data
+            data.pop("tos_accepted")
+            user = User(**data)
+            user.set_password(data.get("password"))
+            # user.is_active = False
             try:
-                User.objects.get(email=data.get("email"))
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError:
                 return Response(
                     {"errors": "User with such email already exists."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            except User.DoesNotExist:
-                data.pop("tos_accepted")
-                user = User(**data)
-                user.set_password(data.get("password"))
-                # user.is_active = False
-                user.save()
-                return Response(
-                    {"token": get_tokens_for_user(user)}, status=status.HTTP_200_OK
-                )
+            return Response(
+                {"token": get_tokens_for_user(user)}, status=status.HTTP_200_OK
+            )
         return Response(
             {"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
         )
 
 
+class RosterImportAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = RosterImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        roster_import = RosterImport.objects.create(
+            school=data["school"],
+            created_by=request.user,
+            file=data["file"],
+            format=data["format"],
+        )
+        transaction.on_commit(lambda: import_roster_upload.delay(roster_import.pk))
+        return Response({"id": roster_import.pk}, status=status.HTTP_202_ACCEPTED)
+
+
+class RosterImportReportAPIView(RetrieveAPIView):
+    permission_classes = (IsAdminUser,)
+    queryset = RosterImport.objects.all()
+    serializer_class = RosterImportReportSerializer
+
+
 class UserPasswordResetLinkGenerateAPIView(APIView):
     permission_classes = ()
 
@@ -87,27 +117,18 @@ class UserPasswordResetLinkGenerateAPIView(APIView):
         try:
             user = User.objects.get(email=serializer.validated_data.get("email"))
             if user.resend_activation_mail_available:
-                mail_subject = _("Password reset - Playpro.gg")
-                message = render_to_string(
-                    "users/acc_password_reset_mail.html",
-                    {
-                        "user": user,
-                        "domain": getattr(settings, "PLAYPRO_URL"),
-                        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
-                        "token": PasswordResetTokenGenerator().make_token(user),
-                    },
-                )
-                email = EmailMessage(
-                    mail_subject,
-                    message,
-                    to=[
+                with transaction.atomic():
+                    user.last_email_reset = datetime.utcnow().replace(tzinfo=pytz.UTC)
+                    user.save(update_fields=["last_email_reset"])
+                    queue_email(
                         user.email,
-                    ],
-                )
-                email.content_subtype = "html"
-                email.send()
-                user.last_email_reset = datetime.utcnow().replace(tzinfo=pytz.UTC)
-                user.save()
+                        _("Password reset - Playpro.gg"),
+                        PASSWORD_RESET_TEMPLATE,
+                        {
+                            "user_id": user.pk,
+                            "domain": getattr(settings, "PLAYPRO_URL"),
+                        },
+                    )
             else:
                 return Response(
                     {